@@ -0,0 +1,131 @@
+import argparse
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+from contextlib import redirect_stdout
+from typing import Any
+
+from lab2 import Color, Printer
+
+FONTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts")
+DEFAULT_FONTS = ["font5.json", "font7.json"]
+DEFAULT_LENGTHS = [1, 10, 100, 1000]
+
+
+class NullSink(io.TextIOBase):
+    """Поток-заглушка: ничего не выводит, но считает вызовы write и байты"""
+
+    def __init__(self, encoding: str = "utf-8") -> None:
+        self._encoding = encoding
+        self.write_calls = 0
+        self.bytes_written = 0
+
+    def write(self, s: str) -> int:
+        self.write_calls += 1
+        self.bytes_written += len(s.encode(self._encoding))
+        return len(s)
+
+    def writable(self) -> bool:
+        return True
+
+
+def _sample_text(font: dict[str, list[str]], length: int) -> str:
+    alphabet = "".join(ch for ch in font if ch != " ")
+    return (alphabet * (length // len(alphabet) + 1))[:length]
+
+
+def _timeit(func: Any, repeat: int) -> float:
+    started = time.perf_counter()
+
+    for _ in range(repeat):
+        func()
+
+    return (time.perf_counter() - started) / repeat
+
+
+def bench_font(font_file: str, lengths: list[int], repeat: int) -> dict[str, Any]:
+    load_seconds = _timeit(lambda: Printer._load_font(font_file), repeat)
+    printer = Printer(Color.GREEN, (1, 1), "#", font_file)
+    results: list[dict[str, Any]] = []
+
+    for length in lengths:
+        text = _sample_text(printer.font, length)
+        render_seconds = _timeit(lambda: printer.render(text), repeat)
+
+        sink = NullSink()
+
+        with redirect_stdout(sink):
+            print_seconds = _timeit(lambda: printer.print(text), repeat)
+
+        results.append(
+            {
+                "length": length,
+                "render_seconds": render_seconds,
+                "render_chars_per_sec": length / render_seconds,
+                "print_seconds": print_seconds,
+                "print_chars_per_sec": length / print_seconds,
+                "bytes_per_print": sink.bytes_written // repeat,
+                "write_calls_per_print": sink.write_calls // repeat,
+            }
+        )
+
+    return {
+        "font": os.path.basename(font_file),
+        "glyphs": len(printer.font),
+        "height": len(next(iter(printer.font.values()))),
+        "load_seconds": load_seconds,
+        "lengths": results,
+    }
+
+
+def profile_print(font_file: str, length: int, repeat: int, top: int) -> None:
+    printer = Printer(Color.GREEN, (1, 1), "#", font_file)
+    text = _sample_text(printer.font, length)
+    profiler = cProfile.Profile()
+
+    with redirect_stdout(NullSink()):
+        profiler.runcall(_timeit, lambda: printer.print(text), repeat)
+
+    pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(top)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк рендера Printer")
+    parser.add_argument("--fonts", nargs="+", default=DEFAULT_FONTS)
+    parser.add_argument("--lengths", nargs="+", type=int, default=DEFAULT_LENGTHS)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--output", help="путь для JSON-отчета (по умолчанию stdout)")
+    parser.add_argument(
+        "--profile", action="store_true", help="профиль cProfile в stderr"
+    )
+    args = parser.parse_args(argv)
+
+    fonts = [
+        path if os.path.isfile(path) else os.path.join(FONTS_DIR, path)
+        for path in args.fonts
+    ]
+
+    report = {
+        "python": sys.version.split()[0],
+        "repeat": args.repeat,
+        "fonts": [bench_font(path, args.lengths, args.repeat) for path in fonts],
+    }
+
+    if args.profile:
+        for path in fonts:
+            profile_print(path, max(args.lengths), args.repeat, top=15)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
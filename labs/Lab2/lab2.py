@@ -1,10 +1,20 @@
 import json
 import sys
 import os
+import time
 
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
 from enum import Enum
+from itertools import islice
 from types import TracebackType
-from typing import Optional, Type, Self
+from typing import Any, BinaryIO, Iterable, Iterator, Optional, Type, Self
+
+try:
+    import numpy as np
+except ImportError:  # numpy нужен только для GlyphAtlas
+    np = None
 
 
 class ANSI(Enum):
@@ -26,12 +36,22 @@ class Color(Enum):
 
 class Printer:
     def __init__(
-        self, color: Color, position: tuple[int, int], symbol: str, font_file: str
+        self,
+        color: Color,
+        position: tuple[int, int],
+        symbol: str,
+        font_file: str,
+        scale: int = 1,
     ) -> None:
+        if scale < 1:
+            raise ValueError("scale must be positive")
+
         self.color: Color = color
         self.position: tuple[int, int] = position
         self.symbol: str = symbol
+        self.scale: int = scale
         self.font: dict[str, list[str]] = self._load_font(font_file)
+        self._atlas: Optional[GlyphAtlas] = None
 
     @staticmethod
     def _load_font(font_file: str) -> dict[str, list[str]]:
@@ -77,6 +97,23 @@ class Printer:
         except Exception as e:
             raise Exception(f"Error while loading {font_file}:\n{e}")
 
+    @staticmethod
+    def _render_lines(font: dict[str, list[str]], text: str, symbol: str) -> list[str]:
+        glyphs: list[list[str]] = [font[ch] for ch in text.upper() if ch in font]
+        height: int = len(next(iter(font.values())))
+
+        return [
+            "".join(glyph[i].replace("#", symbol) + "  " for glyph in glyphs)
+            for i in range(height)
+        ]
+
+    @staticmethod
+    def _join_lines(lines: list[str], color: Optional[Color]) -> str:
+        if color is None:
+            return "".join(line.rstrip() + "\n" for line in lines)
+
+        return "".join(color.value + line + ANSI.RESET.value + "\n" for line in lines)
+
     @classmethod
     def print_static(
         cls,
@@ -91,16 +128,22 @@ class Printer:
 
         sys.stdout.write(ANSI.CLEAR.value)
 
-        for i in range(len(next(iter(font.values())))):
+        for i, line in enumerate(cls._render_lines(font, text, symbol)):
             sys.stdout.write(ANSI.MOVE_CURSOR.value.format(y=y + i, x=x))
-            line = str()
-
-            for ch in text.upper():
-                if ch in font:
-                    line += font[ch][i].replace("#", symbol) + "  "
-
             sys.stdout.write(color.value + line + ANSI.RESET.value + "\n")
 
+    @classmethod
+    def render_static(
+        cls,
+        text: str,
+        symbol: str,
+        font_file: str,
+        color: Optional[Color] = None,
+    ) -> str:
+        """Рендер баннера в строку без управляющих последовательностей курсора"""
+        font: dict[str, list[str]] = cls._load_font(font_file)
+        return cls._join_lines(cls._render_lines(font, text, symbol), color)
+
     def __enter__(self) -> Self:
         sys.stdout.write(ANSI.CLEAR.value)
         return self
@@ -113,15 +156,221 @@ class Printer:
     ) -> None:
         sys.stdout.write(ANSI.RESET.value)
 
+    def _lines(self, text: str) -> list[str]:
+        if self.scale == 1:
+            return self._render_lines(self.font, text, self.symbol)
+
+        if self._atlas is None:
+            self._atlas = GlyphAtlas(self.font)
+
+        return self._atlas.render_lines(text, self.symbol, self.scale)
+
     def print(self, text: str) -> None:
         x, y = self.position
 
-        for i in range(len(next(iter(self.font.values())))):
+        for i, line in enumerate(self._lines(text)):
             sys.stdout.write(ANSI.MOVE_CURSOR.value.format(y=y + i, x=x))
-            line: str = ""
+            sys.stdout.write(self.color.value + line + ANSI.RESET.value + "\n")
 
-            for ch in text.upper():
-                if ch in self.font:
-                    line += self.font[ch][i].replace("#", self.symbol) + "  "
+    def render(self, text: str, colored: bool = False) -> str:
+        return self._join_lines(self._lines(text), self.color if colored else None)
 
-            sys.stdout.write(self.color.value + line + ANSI.RESET.value + "\n")
+    def render_bytes(
+        self, text: str, colored: bool = False, encoding: str = "utf-8"
+    ) -> bytes:
+        return self.render(text, colored).encode(encoding)
+
+
+# region glyph atlas
+
+class GlyphAtlas:
+    """Шрифт в виде булевых матриц numpy: строка рендерится одной склейкой"""
+
+    def __init__(self, font: dict[str, list[str]], spacing: int = 2) -> None:
+        if np is None:
+            raise ImportError("GlyphAtlas requires numpy")
+
+        self.height: int = len(next(iter(font.values())))
+        self.glyphs: dict[str, "np.ndarray"] = {}
+
+        for ch, rows in font.items():
+            width: int = max(len(row) for row in rows)
+            cells = np.array(
+                [[c == "#" for c in row.ljust(width)] for row in rows], dtype=bool
+            )
+            # межсимвольный отступ хранится прямо в матрице глифа
+            self.glyphs[ch] = np.pad(cells, ((0, 0), (0, spacing)))
+
+    @classmethod
+    def from_file(cls, font_file: str, spacing: int = 2) -> Self:
+        return cls(Printer._load_font(font_file), spacing)
+
+    def matrix(self, text: str, scale: int = 1) -> "np.ndarray":
+        if scale < 1:
+            raise ValueError("scale must be positive")
+
+        glyphs = [self.glyphs[ch] for ch in text.upper() if ch in self.glyphs]
+
+        if not glyphs:
+            return np.zeros((self.height * scale, 0), dtype=bool)
+
+        cells = np.hstack(glyphs)
+
+        if scale > 1:
+            cells = cells.repeat(scale, axis=0).repeat(scale, axis=1)
+
+        return cells
+
+    def render_lines(self, text: str, symbol: str = "#", scale: int = 1) -> list[str]:
+        cells = self.matrix(text, scale)
+
+        if len(symbol) == 1:
+            # символы как кодовые точки UTF-32: вся матрица декодируется за один вызов
+            table = np.array([ord(" "), ord(symbol)], dtype="<u4")
+            codes = np.hstack(
+                [table[cells.view(np.uint8)], np.full((len(cells), 1), ord("\n"), "<u4")]
+            )
+            return codes.tobytes().decode("utf-32-le").split("\n")[:-1]
+
+        chars = np.where(cells, symbol, " ")
+        return ["".join(row) for row in chars]
+
+    def render(self, text: str, symbol: str = "#", scale: int = 1) -> str:
+        return Printer._join_lines(self.render_lines(text, symbol, scale), None)
+
+
+# endregion
+
+# region batch export
+
+BannerJob = tuple[str, str, dict[str, Any]]
+
+# Кэш шрифтов внутри процесса-воркера: каждый шрифт читается с диска один раз
+_font_cache: dict[str, dict[str, list[str]]] = {}
+_atlas_cache: dict[str, GlyphAtlas] = {}
+
+
+def _render_job(job: BannerJob) -> bytes:
+    text, font_file, options = job
+
+    font: Optional[dict[str, list[str]]] = _font_cache.get(font_file)
+
+    if font is None:
+        font = _font_cache[font_file] = Printer._load_font(font_file)
+
+    color: Optional[Color | str] = options.get("color")
+
+    if isinstance(color, str):
+        color = Color[color.upper()]
+
+    symbol: str = options.get("symbol", "#")
+    scale: int = options.get("scale", 1)
+
+    if scale == 1:
+        lines: list[str] = Printer._render_lines(font, text, symbol)
+
+    else:
+        atlas: Optional[GlyphAtlas] = _atlas_cache.get(font_file)
+
+        if atlas is None:
+            atlas = _atlas_cache[font_file] = GlyphAtlas(font)
+
+        lines = atlas.render_lines(text, symbol, scale)
+
+    banner: str = Printer._join_lines(lines, color)
+
+    return banner.encode(options.get("encoding", "utf-8"))
+
+
+def _render_chunk(jobs: list[BannerJob]) -> list[bytes]:
+    return [_render_job(job) for job in jobs]
+
+
+@dataclass
+class ExportStats:
+    banners: int = 0
+    bytes_written: int = 0
+    seconds: float = 0.0
+
+    @property
+    def banners_per_sec(self) -> float:
+        return self.banners / self.seconds if self.seconds else 0.0
+
+    @property
+    def bytes_per_sec(self) -> float:
+        return self.bytes_written / self.seconds if self.seconds else 0.0
+
+
+class BannerExporter:
+    """
+    Пакетный рендер баннеров в пуле процессов с потоковой записью на диск.
+    Задания читаются пачками по chunksize, в работе не больше max_pending
+    пачек (по умолчанию две на процесс), поэтому память не зависит от
+    числа заданий, а баннеры выдаются в исходном порядке
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        chunksize: int = 64,
+        separator: bytes = b"\n",
+        max_pending: Optional[int] = None,
+    ) -> None:
+        if chunksize < 1:
+            raise ValueError("chunksize must be positive")
+
+        if max_pending is not None and max_pending < 1:
+            raise ValueError("max_pending must be positive")
+
+        self.workers = workers
+        self.chunksize = chunksize
+        self.separator = separator
+        self.max_pending = max_pending
+
+    def iter_render(self, jobs: Iterable[BannerJob]) -> Iterator[bytes]:
+        workers: int = self.workers or os.cpu_count() or 1
+        max_pending: int = self.max_pending or 2 * workers
+        source: Iterator[BannerJob] = iter(jobs)
+        pending: deque[Future[list[bytes]]] = deque()
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            try:
+                while True:
+                    while len(pending) < max_pending:
+                        chunk: list[BannerJob] = list(islice(source, self.chunksize))
+
+                        if not chunk:
+                            break
+
+                        pending.append(pool.submit(_render_chunk, chunk))
+
+                    if not pending:
+                        return
+
+                    yield from pending.popleft().result()
+            finally:
+                # при досрочной остановке еще не начатые пачки не рендерятся
+                for future in pending:
+                    future.cancel()
+
+    def export(self, jobs: Iterable[BannerJob], output: str | BinaryIO) -> ExportStats:
+        if isinstance(output, str):
+            with open(output, "wb") as file:
+                return self.export(jobs, file)
+
+        stats = ExportStats()
+        started: float = time.perf_counter()
+
+        for banner in self.iter_render(jobs):
+            output.write(banner)
+            output.write(self.separator)
+
+            stats.banners += 1
+            stats.bytes_written += len(banner) + len(self.separator)
+
+        stats.seconds = time.perf_counter() - started
+
+        return stats
+
+
+# endregion
@@ -0,0 +1,398 @@
+import argparse
+import io
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from contextlib import ExitStack, closing, redirect_stdout
+from typing import Any, Callable, Optional
+
+from lab3 import (
+    CompressedFileHandler,
+    CompressionMethod,
+    ConsoleHandler,
+    FileHandler,
+    LogFilterProtocol,
+    LogHandlerProtocol,
+    LogLevel,
+    Logger,
+    MatchMode,
+    MultiPatternFilter,
+    ReLogFilter,
+    SimpleLogFilter,
+    SocketHandler,
+    StandardFormatter,
+)
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+MESSAGE = "INFO [2025.01.01 12:00:00] user=42 action=login status=ok latency_ms=12"
+
+
+class LegacyFileHandler(LogHandlerProtocol):
+    """Прежнее поведение FileHandler: open/append/close на каждую запись"""
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+
+    def handle(self, log_level: LogLevel, text: str) -> None:
+        with open(self.filename, "a", encoding="utf-8") as file:
+            file.write(f"{text}\n")
+
+
+def _lines_per_sec(handler: LogHandlerProtocol, records: int) -> float:
+    started = time.perf_counter()
+
+    for _ in range(records):
+        handler.handle(LogLevel.INFO, MESSAGE)
+
+    close = getattr(handler, "close", None)
+
+    if close is not None:
+        close()
+
+    return records / (time.perf_counter() - started)
+
+
+def bench_file(records: int) -> dict[str, Any]:
+    variants: dict[str, Callable[[str], LogHandlerProtocol]] = {
+        "legacy_open_per_line": LegacyFileHandler,
+        "flush_every_1": lambda path: FileHandler(path),
+        "flush_every_100": lambda path: FileHandler(path, flush_every=100),
+        "flush_interval_100ms": lambda path: FileHandler(
+            path, flush_every=None, flush_interval_ms=100
+        ),
+        "flush_every_100_fsync": lambda path: FileHandler(
+            path, flush_every=100, fsync=True
+        ),
+        "compressed_gzip": lambda path: CompressedFileHandler(path, CompressionMethod.GZIP),
+        "compressed_xz": lambda path: CompressedFileHandler(path, CompressionMethod.LZMA),
+    }
+    results: dict[str, Any] = {}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name, factory in variants.items():
+            path = os.path.join(temp_dir, f"{name}.log")
+            results[name] = {"lines_per_sec": _lines_per_sec(factory(path), records)}
+
+    return results
+
+
+def file_speedups(results: dict[str, Any]) -> dict[str, Any]:
+    """Ускорение относительно прежнего обработчика, по уже объединенным прогонам"""
+    legacy = results["legacy_open_per_line"]["lines_per_sec"]
+
+    for result in results.values():
+        result["speedup"] = result["lines_per_sec"] / legacy
+
+    return results
+
+
+def _filter_rate(match: Callable[[str], bool], texts: list[str], records: int) -> float:
+    started = time.perf_counter()
+
+    for i in range(records):
+        match(texts[i % len(texts)])
+
+    return records / (time.perf_counter() - started)
+
+
+def bench_filters(records: int) -> dict[str, Any]:
+    keywords = [f"keyword{i:03d}" for i in range(100)] + ["timeout", "refused", "denied"]
+    patterns = [rf"code=E{i:03d}\b" for i in range(20)] + [r"\d{4}-\d{2}-\d{2}"]
+    texts = [
+        f"{MESSAGE} request={i} host=web-{i % 7} path=/api/v1/items/{i}" for i in range(50)
+    ] + [f"{MESSAGE} connection refused code=E0{i:02d}" for i in range(10)]
+
+    chain: list[LogFilterProtocol] = [SimpleLogFilter(k) for k in keywords]
+    chain += [ReLogFilter(p) for p in patterns]
+    combined_any = MultiPatternFilter(keywords, patterns, MatchMode.ANY)
+    combined_all = MultiPatternFilter(keywords, patterns, MatchMode.ALL)
+
+    variants: dict[str, Callable[[str], bool]] = {
+        "chain_any": lambda text: any(f.match(LogLevel.INFO, text) for f in chain),
+        "multi_pattern_any": lambda text: combined_any.match(LogLevel.INFO, text),
+        "chain_all": lambda text: all(f.match(LogLevel.INFO, text) for f in chain),
+        "multi_pattern_all": lambda text: combined_all.match(LogLevel.INFO, text),
+    }
+
+    results: dict[str, Any] = {"patterns": len(keywords) + len(patterns)}
+
+    for name, match in variants.items():
+        results[name] = {"records_per_sec": _filter_rate(match, texts, records)}
+
+    return results
+
+
+class NullSink(io.TextIOBase):
+    def write(self, s: str) -> int:
+        return len(s)
+
+    def writable(self) -> bool:
+        return True
+
+
+class NullHandler(LogHandlerProtocol):
+    def handle(self, log_level: LogLevel, text: str) -> None:
+        pass
+
+
+class SinkServer:
+    """Локальный TCP-сервер, читающий и отбрасывающий все данные"""
+
+    def __init__(self) -> None:
+        self.sock = socket.create_server(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self) -> None:
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+
+            threading.Thread(target=self._drain, args=(conn,), daemon=True).start()
+
+    @staticmethod
+    def _drain(conn: socket.socket) -> None:
+        with conn:
+            while conn.recv(1 << 16):
+                pass
+
+    def close(self) -> None:
+        self.sock.shutdown(socket.SHUT_RDWR)
+        self.sock.close()
+
+
+def _percentile(sorted_values: list[int], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))] / 1e9
+
+
+def _run_logger(logger: Logger, records: int) -> dict[str, float]:
+    latencies = [0] * records
+    clock = time.perf_counter_ns
+    log = logger.log
+    started = clock()
+
+    for i in range(records):
+        call_started = clock()
+        log(LogLevel.INFO, MESSAGE)
+        latencies[i] = clock() - call_started
+
+    # фоновые обработчики дописывают очередь: это входит в пропускную способность
+    for handler in logger.handlers:
+        close = getattr(handler, "close", None)
+
+        if close is not None:
+            close()
+
+    elapsed = (clock() - started) / 1e9
+    latencies.sort()
+
+    return {
+        "records_per_sec": records / elapsed,
+        "p50_seconds": _percentile(latencies, 0.50),
+        "p99_seconds": _percentile(latencies, 0.99),
+    }
+
+
+def _console_logger(stack: ExitStack, temp_dir: str) -> Logger:
+    stack.enter_context(redirect_stdout(NullSink()))
+    return Logger(handlers=[ConsoleHandler()], formatters=[StandardFormatter()])
+
+
+def bench_logger(records: int) -> dict[str, Any]:
+    lowered = MESSAGE.lower()
+    # 50 разных подстрок сообщения: каждый фильтр проверяется и пропускает запись
+    keywords = list(dict.fromkeys(lowered[i:i + 5] for i in range(len(lowered) - 4)))[:50]
+    many_filters: list[LogFilterProtocol] = [SimpleLogFilter(k) for k in keywords]
+    formatters = [StandardFormatter()]
+
+    configs: dict[str, Callable[[ExitStack, str], Logger]] = {
+        "console_null_sink": _console_logger,
+        "file": lambda stack, temp_dir: Logger(
+            handlers=[FileHandler(os.path.join(temp_dir, "file.log"))],
+            formatters=formatters,
+        ),
+        "file_flush_every_1000": lambda stack, temp_dir: Logger(
+            handlers=[FileHandler(os.path.join(temp_dir, "buffered.log"), flush_every=1000)],
+            formatters=formatters,
+        ),
+        "socket_local_server": lambda stack, temp_dir: Logger(
+            handlers=[SocketHandler("127.0.0.1", stack.enter_context(closing(SinkServer())).port)],
+            formatters=formatters,
+        ),
+        "filters_1": lambda stack, temp_dir: Logger(
+            filters=many_filters[:1], handlers=[NullHandler()], formatters=formatters,
+        ),
+        "filters_50": lambda stack, temp_dir: Logger(
+            filters=many_filters, handlers=[NullHandler()], formatters=formatters,
+        ),
+        "filters_50_multi_pattern": lambda stack, temp_dir: Logger(
+            filters=[MultiPatternFilter(keywords, mode=MatchMode.ALL)],
+            handlers=[NullHandler()], formatters=formatters,
+        ),
+    }
+    results: dict[str, Any] = {}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name, build in configs.items():
+            with ExitStack() as stack:
+                results[name] = _run_logger(build(stack, temp_dir), records)
+
+    return results
+
+
+BENCHMARKS: dict[str, Callable[[int], dict[str, Any]]] = {
+    "file": bench_file,
+    "filters": bench_filters,
+    "logger": bench_logger,
+}
+
+# величины, вычисляемые из результатов после объединения прогонов
+DERIVED: dict[str, Callable[[dict[str, Any]], dict[str, Any]]] = {
+    "file": file_speedups,
+}
+
+
+def _best_of(runs: list[dict[str, Any]]) -> dict[str, Any]:
+    """Объединяет повторные прогоны: лучшая пропускная способность и задержка"""
+    best: dict[str, Any] = {}
+
+    for key, value in runs[0].items():
+        values = [run[key] for run in runs]
+
+        if isinstance(value, dict):
+            best[key] = _best_of(values)
+        elif key.endswith("_per_sec"):
+            best[key] = max(values)
+        elif key.endswith("_seconds"):
+            best[key] = min(values)
+        else:
+            best[key] = value
+
+    return best
+
+
+def _summarize(name: str, runs: list[dict[str, Any]]) -> dict[str, Any]:
+    best = _best_of(runs)
+    derive = DERIVED.get(name)
+
+    return derive(best) if derive is not None else best
+
+
+def _metrics(results: dict[str, Any], suffix: str, prefix: str = "") -> dict[str, float]:
+    found: dict[str, float] = {}
+
+    for key, value in results.items():
+        if isinstance(value, dict):
+            found.update(_metrics(value, suffix, f"{prefix}{key}."))
+        elif key.endswith(suffix):
+            found[f"{prefix}{key}"] = value
+
+    return found
+
+
+def check_regressions(results: dict[str, Any], baseline: dict[str, Any],
+                      tolerance: float, latency_tolerance: Optional[float] = None) -> list[str]:
+    """Падение пропускной способности (*_per_sec) и рост задержек (*_seconds)"""
+    if latency_tolerance is None:
+        latency_tolerance = tolerance
+
+    current = _metrics(results, "_per_sec")
+    expected = _metrics(baseline, "_per_sec")
+    regressions = [
+        f"{name}: {current[name]:.0f}/s < {expected[name]:.0f}/s * (1 - {tolerance})"
+        for name in sorted(current.keys() & expected.keys())
+        if current[name] < expected[name] * (1 - tolerance)
+    ]
+
+    current = _metrics(results, "_seconds")
+    expected = _metrics(baseline, "_seconds")
+    regressions += [
+        f"{name}: {current[name] * 1e6:.2f}us > "
+        f"{expected[name] * 1e6:.2f}us * (1 + {latency_tolerance})"
+        for name in sorted(current.keys() & expected.keys())
+        if current[name] > expected[name] * (1 + latency_tolerance)
+    ]
+
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарки обработчиков Logger")
+    parser.add_argument("benchmarks", nargs="*",
+                        help=f"какие бенчмарки запускать: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--records", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="число прогонов, в отчет идет лучший результат")
+    parser.add_argument("--output", help="путь для JSON-отчета (по умолчанию stdout)")
+    parser.add_argument("--baseline", default=BASELINE, help="файл эталонных результатов")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="сохранить результаты как эталон")
+    parser.add_argument("--check", action="store_true",
+                        help="код возврата 1 при падении пропускной способности")
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="допустимое падение пропускной способности (доля)")
+    parser.add_argument("--latency-tolerance", type=float, default=1.0,
+                        help="допустимый рост задержек p50/p99 (доля): они шумнее")
+    args = parser.parse_args(argv)
+    names = args.benchmarks or list(BENCHMARKS)
+
+    for name in names:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark: {name}")
+
+    report = {
+        "python": sys.version.split()[0],
+        "records": args.records,
+        "repeat": args.repeat,
+        "results": {
+            name: _summarize(name, [BENCHMARKS[name](args.records) for _ in range(args.repeat)])
+            for name in names
+        },
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            baseline = {key: report[key] for key in ("records", "repeat", "results")}
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+
+    if args.check:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+        # часть метрик зависит от числа записей (например, сжатие амортизирует блок на прогон)
+        if baseline.get("records") != args.records:
+            sys.stderr.write(f"[!] baseline was recorded with --records {baseline.get('records')}, "
+                             f"got --records {args.records}: not comparable\n")
+            sys.exit(2)
+
+        if baseline.get("repeat") != args.repeat:
+            sys.stderr.write(f"[!] baseline was recorded with --repeat {baseline.get('repeat')}, "
+                             f"got --repeat {args.repeat}\n")
+
+        regressions = check_regressions(report["results"], baseline["results"], args.tolerance,
+                                        args.latency_tolerance)
+
+        for regression in regressions:
+            sys.stderr.write(f"[!] regression {regression}\n")
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
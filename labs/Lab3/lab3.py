@@ -1,11 +1,63 @@
+import asyncio
+import atexit
+import gzip
+import io
+import json
+import lzma
+import math
+import mmap
+import multiprocessing
+import os
+import queue
 import re
+import struct
 import sys
+import threading
+import time
+import zlib
 from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
+from heapq import merge
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 from enum import Enum
 from ftplib import FTP
 from socket import socket, AF_INET, SOCK_STREAM
 from datetime import datetime
-from typing import Optional
+from types import TracebackType
+from typing import (
+    BinaryIO, Callable, Generic, Iterable, Iterator, NamedTuple, Optional, Self, TextIO,
+    Type, TypeVar,
+)
+
+T = TypeVar("T")
+
+
+class _ObservedList(list[T]):
+    """Список, сообщающий владельцу о каждом изменении на месте"""
+
+    def __init__(self, items: Iterable[T], on_change: Callable[[], None]) -> None:
+        super().__init__(items)
+        self._on_change = on_change
+
+
+def _notifying(name: str) -> Callable[..., object]:
+    method = getattr(list, name)
+
+    def wrapper(self: _ObservedList[T], *args: object) -> object:
+        result = method(self, *args)
+        self._on_change()
+        return result
+
+    wrapper.__name__ = name
+    return wrapper
+
+
+for _name in ("append", "extend", "insert", "remove", "pop", "clear", "sort", "reverse",
+              "__setitem__", "__delitem__", "__iadd__", "__imul__"):
+    setattr(_ObservedList, _name, _notifying(_name))
 
 
 class LogLevel(Enum):
@@ -16,6 +68,64 @@ class LogLevel(Enum):
     CRITICAL = "CRITICAL"
 
 
+LEVELS_ORDER: dict[LogLevel, int] = {
+    LogLevel.DEBUG: -1,
+    LogLevel.INFO: 0,
+    LogLevel.WARNING: 1,
+    LogLevel.ERROR: 2,
+    LogLevel.CRITICAL: 3,
+}
+
+LEVEL_CODES: dict[LogLevel, int] = {level: code for code, level in enumerate(LogLevel)}
+LEVELS_BY_CODE: list[LogLevel] = list(LogLevel)
+LEVELS_BY_NAME: dict[str, LogLevel] = {level.value: level for level in LogLevel}
+
+
+class LogRecord(NamedTuple):
+    timestamp: float
+    level: LogLevel
+    message: str
+
+
+_LOGFMT_UNSAFE = re.compile(r'[\s="]')
+
+
+def serialize_fields(fields: dict[str, object]) -> tuple[str, str]:
+    """Поля записи в виде фрагмента JSON-объекта (без скобок) и пар logfmt"""
+    if not fields:
+        return "", ""
+
+    json_fragment = json.dumps(fields, ensure_ascii=False, default=str)[1:-1]
+    pairs = []
+
+    for key, value in fields.items():
+        value = str(value)
+
+        if not value or _LOGFMT_UNSAFE.search(value):
+            value = json.dumps(value, ensure_ascii=False)
+
+        pairs.append(f"{key}={value}")
+
+    return json_fragment, " ".join(pairs)
+
+
+class StructuredMessage(str):
+    """
+    Сообщение с полями. Строковое значение — текст и поля в формате logfmt,
+    поэтому фильтры и текстовые обработчики работают с ним как со строкой.
+    Поля дополнительно хранятся готовым фрагментом JSON для JsonFormatter
+    """
+
+    message: str
+    fields_json: str
+
+    def __new__(cls, message: str, fields_json: str, fields_logfmt: str) -> Self:
+        self = super().__new__(cls, f"{message} {fields_logfmt}" if fields_logfmt else message)
+        self.message = message
+        self.fields_json = fields_json
+        return self
+
+
 # region abstract classes
 
 class LogFilterProtocol(ABC):
@@ -36,6 +146,122 @@ class LogFormatterProtocol(ABC):
         pass
 
 
+class LogBytesHandlerProtocol(ABC):
+    """Обработчик готовой записи: строка в utf-8 с переводом строки"""
+
+    @abstractmethod
+    def handle_bytes(self, log_level: LogLevel, data: bytes) -> None:
+        pass
+
+    def handle_batch(self, records: list[tuple[LogLevel, bytes]]) -> None:
+        for log_level, data in records:
+            self.handle_bytes(log_level, data)
+
+
+class AsyncLogHandlerProtocol(ABC):
+    @abstractmethod
+    async def handle(self, log_level: LogLevel, text: str) -> None:
+        pass
+
+
+# endregion
+
+# region Queue classes
+
+class OverflowPolicy(Enum):
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+
+
+class RecordQueue(Generic[T]):
+    """Ограниченная очередь с политикой переполнения и пакетным чтением"""
+
+    def __init__(self, capacity: int,
+                 policy: OverflowPolicy = OverflowPolicy.BLOCK) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+
+        self.capacity = capacity
+        self.policy = policy
+        self.dropped = 0
+
+        self._items: deque[T] = deque()
+        self._unfinished = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._all_done = threading.Condition(self._lock)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def put(self, item: T, timeout: Optional[float] = None) -> bool:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("RecordQueue is closed")
+
+            if len(self._items) >= self.capacity:
+                if self.policy is OverflowPolicy.DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+
+                if self.policy is OverflowPolicy.DROP_OLDEST:
+                    self._items.popleft()
+                    self._task_done(1)
+                    self.dropped += 1
+
+                elif not self._not_full.wait_for(
+                        lambda: len(self._items) < self.capacity or self._closed, timeout):
+                    self.dropped += 1
+                    return False
+
+                elif self._closed:
+                    raise RuntimeError("RecordQueue is closed")
+
+            self._items.append(item)
+            self._unfinished += 1
+            self._not_empty.notify()
+
+            return True
+
+    def get_batch(self, max_items: int, timeout: Optional[float] = None) -> list[T]:
+        with self._lock:
+            self._not_empty.wait_for(lambda: self._items or self._closed, timeout)
+
+            batch = [self._items.popleft() for _ in range(min(max_items, len(self._items)))]
+
+            if batch:
+                self._not_full.notify(len(batch))
+
+            return batch
+
+    def task_done(self, count: int = 1) -> None:
+        with self._lock:
+            self._task_done(count)
+
+    def _task_done(self, count: int) -> None:
+        self._unfinished -= count
+
+        if self._unfinished <= 0:
+            self._all_done.notify_all()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        with self._lock:
+            return self._all_done.wait_for(lambda: self._unfinished <= 0, timeout)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+
 # endregion
 
 # region Filter classes
@@ -61,134 +287,3188 @@ class ReLogFilter(LogFilterProtocol):
 
 class LevelFilter(LogFilterProtocol):
     def __init__(self, log_level: LogLevel) -> None:
+        try:
+            self.threshold = LEVELS_ORDER[log_level]
+        except KeyError as e:
+            raise ValueError(f"Unknown log level: {e}")
+
         self.log_level = log_level
-        self.levels_order: dict[LogLevel, int] = {
-            LogLevel.DEBUG: -1,
-            LogLevel.INFO: 0,
-            LogLevel.WARNING: 1,
-            LogLevel.ERROR: 2,
-            LogLevel.CRITICAL: 3,
-        }
 
     def match(self, log_level: LogLevel, text: str) -> bool:
         try:
-            return self.levels_order[log_level] >= self.levels_order[self.log_level]
+            return LEVELS_ORDER[log_level] >= self.threshold
         except KeyError as e:
             raise ValueError(f"Unknown log level: {e}")
 
 
+class MatchMode(Enum):
+    ANY = "any"
+    ALL = "all"
+
+
+class MultiPatternFilter(LogFilterProtocol):
+    """
+    Замена цепочке SimpleLogFilter/ReLogFilter. Ключевые слова (без учета
+    регистра) собираются в префиксное дерево, скомпилированное в одно
+    регулярное выражение, поэтому текст сканируется одним проходом в C.
+    Текст приводится к нижнему регистру не более одного раза
+    """
+
+    def __init__(self, keywords: Optional[Iterable[str]] = None,
+                 patterns: Optional[Iterable[str]] = None,
+                 mode: MatchMode = MatchMode.ANY) -> None:
+        self.mode = mode
+        self.keywords = list(dict.fromkeys(keyword.lower() for keyword in keywords or []))
+        self.patterns: list[re.Pattern[str]] = []
+
+        for pattern in patterns or []:
+            try:
+                self.patterns.append(re.compile(pattern))
+            except re.error as e:
+                raise ValueError(f"Invalid regex pattern {pattern}: {e}") from e
+
+        self._keywords = self._compile_trie(self.keywords) if self.keywords else None
+
+    @staticmethod
+    def _compile_trie(keywords: list[str]) -> re.Pattern[str]:
+        trie: dict[str, dict] = {}
+
+        for keyword in keywords:
+            node = trie
+
+            for ch in keyword:
+                node = node.setdefault(ch, {})
+
+            node[""] = {}
+
+        def build(node: dict[str, dict]) -> str:
+            branches = [re.escape(ch) + build(child) for ch, child in node.items() if ch]
+
+            if not branches:
+                return ""
+
+            optional = "" in node
+            body = branches[0] if len(branches) == 1 and not optional else (
+                "(?:" + "|".join(branches) + ")"
+            )
+
+            return body + "?" if optional else body
+
+        return re.compile(build(trie))
+
+    def match(self, log_level: LogLevel, text: str) -> bool:
+        if self.mode is MatchMode.ANY:
+            if self._keywords is not None and self._keywords.search(text.lower()):
+                return True
+
+            return any(p.search(text) for p in self.patterns)
+
+        if self.keywords:
+            lowered = text.lower()
+
+            for keyword in self.keywords:
+                if keyword not in lowered:
+                    return False
+
+        for pattern in self.patterns:
+            if not pattern.search(text):
+                return False
+
+        return True
+
+
+class RateLimitKey(Enum):
+    LEVEL = "level"
+    MESSAGE = "message"
+
+
+class RateLimitFilter(LogFilterProtocol):
+    """
+    Token bucket: до burst записей подряд, далее rate записей в секунду
+    на ключ (уровень или текст сообщения). Число ключей ограничено max_keys,
+    самые давно не встречавшиеся ключи вытесняются
+    """
+
+    def __init__(self, rate: float, burst: int = 1,
+                 key: RateLimitKey = RateLimitKey.LEVEL,
+                 max_keys: int = 1024) -> None:
+        if rate <= 0 or burst < 1 or max_keys < 1:
+            raise ValueError("rate, burst and max_keys must be positive")
+
+        self.rate = rate
+        self.burst = burst
+        self.key = key
+        self.max_keys = max_keys
+        self.suppressed = 0
+
+        self._buckets: OrderedDict[object, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def match(self, log_level: LogLevel, text: str) -> bool:
+        key = log_level if self.key is RateLimitKey.LEVEL else text
+        now = time.monotonic()
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._buckets.popitem(last=False)
+
+                bucket = self._buckets[key] = [float(self.burst), now]
+            else:
+                self._buckets.move_to_end(key)
+
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+
+            if tokens >= 1:
+                bucket[0] = tokens - 1
+                return True
+
+            bucket[0] = tokens
+            self.suppressed += 1
+
+            return False
+
+
+class DedupFilter(LogFilterProtocol):
+    """
+    Пропускает одинаковую запись (уровень + текст) не чаще раза в window
+    секунд. Когда окно закрывается, подавленные повторы сводятся в одну
+    запись "текст [repeated N times]" и отдаются в emit(level, text).
+    Логгер, в filters которого стоит фильтр без emit, подставляет свою
+    отправку сам. flush() и close() выдают накопленные сводки досрочно
+    """
+
+    def __init__(self, window: float, max_keys: int = 1024,
+                 emit: Optional[Callable[[LogLevel, str], None]] = None) -> None:
+        if window <= 0 or max_keys < 1:
+            raise ValueError("window and max_keys must be positive")
+
+        self.window = window
+        self.max_keys = max_keys
+        self.emit = emit
+        self.suppressed = 0
+
+        # ключ -> [начало окна, подавлено в окне]; порядок совпадает с началом окон
+        self._seen: OrderedDict[tuple[LogLevel, str], list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._timer_due = 0.0
+
+    def match(self, log_level: LogLevel, text: str) -> bool:
+        key = (log_level, text)
+        now = time.monotonic()
+
+        with self._lock:
+            summaries = self._expire(now)
+            entry = self._seen.get(key)
+
+            if entry is not None:
+                entry[1] += 1
+                self.suppressed += 1
+                self._schedule(entry[0] + self.window)
+            else:
+                if len(self._seen) >= self.max_keys:
+                    evicted, (_, repeats) = self._seen.popitem(last=False)
+
+                    if repeats:
+                        summaries.append((evicted, int(repeats)))
+
+                self._seen[key] = [now, 0]
+
+        # сводки закрывшихся окон уходят раньше текущей записи
+        self._publish(summaries)
+
+        return entry is None
+
+    def _expire(self, now: float) -> list[tuple[tuple[LogLevel, str], int]]:
+        summaries = []
+
+        while self._seen:
+            key, (started, repeats) = next(iter(self._seen.items()))
+
+            if now - started < self.window:
+                break
+
+            self._seen.popitem(last=False)
+
+            if repeats:
+                summaries.append((key, int(repeats)))
+
+        return summaries
+
+    def _schedule(self, due: float) -> None:
+        if self.emit is None or (self._timer is not None and self._timer_due <= due):
+            return
+
+        if self._timer is not None:
+            self._timer.cancel()
+        else:
+            # сводки, ждущие таймера, выдаются и при выходе из процесса
+            atexit.register(self.close)
+
+        self._timer = threading.Timer(max(0.0, due - time.monotonic()), self._on_timer)
+        self._timer.daemon = True
+        self._timer_due = due
+        self._timer.start()
+
+    def _on_timer(self) -> None:
+        with self._lock:
+            self._timer = None
+            atexit.unregister(self.close)
+            summaries = self._expire(time.monotonic())
+            pending = next((started for started, repeats in self._seen.values() if repeats), None)
+
+            if pending is not None:
+                self._schedule(pending + self.window)
+
+        self._publish(summaries)
+
+    def _publish(self, summaries: list[tuple[tuple[LogLevel, str], int]]) -> None:
+        if self.emit is None:
+            return
+
+        for (log_level, text), repeats in summaries:
+            try:
+                self.emit(log_level, f"{text} [repeated {repeats} times]")
+            except Exception as ex:
+                print(f"[!] DedupFilter error: {ex}")
+
+    def flush(self) -> None:
+        with self._lock:
+            summaries = []
+
+            for key, entry in self._seen.items():
+                if entry[1]:
+                    summaries.append((key, int(entry[1])))
+                    entry[1] = 0
+
+        self._publish(summaries)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+                atexit.unregister(self.close)
+
+        self.flush()
+
+
 # endregion
 
 # region Handler classes
 
+IOV_MAX = os.sysconf("SC_IOV_MAX") if hasattr(os, "sysconf") else 1024
+
+
+def _scatter_write(write: Callable[[list[memoryview]], int], chunks: list[bytes]) -> None:
+    """
+    Пишет буферы без склейки через writev/sendmsg-подобную функцию,
+    продолжая с места частичной записи
+    """
+    views = [memoryview(chunk) for chunk in chunks]
+    start = 0
+
+    while start < len(views):
+        written = write(views[start:start + IOV_MAX])
+
+        while start < len(views) and written >= len(views[start]):
+            written -= len(views[start])
+            start += 1
+
+        if written:
+            views[start] = views[start][written:]
+
+
 class ConsoleHandler(LogHandlerProtocol):
     def handle(self, log_level: LogLevel, text: str) -> None:
         print(text)
 
 
-class FileHandler(LogHandlerProtocol):
-    def __init__(self, filename: str) -> None:
+class FileHandler(LogHandlerProtocol, LogBytesHandlerProtocol):
+    """
+    Файл открывается один раз в двоичном режиме и пишется через буфер.
+    Буфер сбрасывается каждые flush_every записей, на записи уровня
+    flush_level и выше, а также не позже чем через flush_interval_ms
+    миллисекунд после записи: это проверяет фоновый поток, даже если новых
+    записей нет. Пачка записей (handle_batch) пишется одним writev
+    """
+
+    def __init__(self, filename: str,
+                 flush_every: Optional[int] = 1,
+                 flush_interval_ms: Optional[float] = None,
+                 flush_level: Optional[LogLevel] = LogLevel.ERROR,
+                 fsync: bool = False,
+                 buffer_size: int = 64 * 1024) -> None:
+        if flush_every is not None and flush_every < 1:
+            raise ValueError("flush_every must be positive")
+
         self.filename = filename
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval_ms / 1000 if flush_interval_ms is not None else None
+        self.flush_level = flush_level
+        self.fsync = fsync
+        self.buffer_size = buffer_size
+
+        self._file: Optional[BinaryIO] = None
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._closing = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
 
     def handle(self, log_level: LogLevel, text: str) -> None:
-        with open(self.filename, "a", encoding="utf-8") as file:
-            file.write(f"{text}\n")
+        self.handle_bytes(log_level, f"{text}\n".encode("utf-8"))
 
+    def handle_bytes(self, log_level: LogLevel, data: bytes) -> None:
+        with self._lock:
+            self._write(log_level, data)
 
-class SocketHandler(LogHandlerProtocol):
-    def __init__(self, host: str, port: int) -> None:
-        self.host = host
-        self.port = port
+            if self.flush_interval is not None and self._pending == 1:
+                self._start_flusher()
+                self._dirty.set()
 
-    def handle(self, log_level: LogLevel, text: str) -> None:
-        try:
-            with socket(AF_INET, SOCK_STREAM) as sock:
-                sock.connect((self.host, self.port))
-                sock.sendall(f"{text}\n".encode("utf-8"))
+    def _start_flusher(self) -> None:
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._run, name="FileHandler", daemon=True)
+            self._flusher.start()
+            atexit.register(self.close)
 
-        except Exception as ex:
-            print(f"[!] SocketHandler error: {ex}")
+    def _run(self) -> None:
+        while True:
+            # поток спит, пока в буфере нет записей
+            self._dirty.wait()
 
+            with self._lock:
+                delay = self._last_flush + self.flush_interval - time.monotonic()
 
-class SysLogHandler(LogHandlerProtocol):
-    def handle(self, log_level: LogLevel, text: str) -> None:
-        sys.stderr.write(f"SYSLOG: {text}\n")
+            if self._closing.wait(max(0.0, delay)):
+                return
+
+            with self._lock:
+                if not self._pending:
+                    self._dirty.clear()
+                elif time.monotonic() - self._last_flush >= self.flush_interval:
+                    try:
+                        self._flush()
+                    except Exception as ex:
+                        print(f"[!] FileHandler error: {ex}")
+
+                    self._dirty.clear()
+
+    def handle_batch(self, records: list[tuple[LogLevel, bytes]]) -> None:
+        if not records:
+            return
+
+        with self._lock:
+            self._open()
+            # буфер сбрасывается первым, чтобы пачка не обогнала прежние записи
+            self._file.flush()
+
+            if hasattr(os, "writev"):
+                fd = self._file.fileno()
+                _scatter_write(lambda views: os.writev(fd, views), [data for _, data in records])
+            else:
+                self._file.write(b"".join(data for _, data in records))
+                self._file.flush()
+
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+            self._pending = 0
+            self._last_flush = time.monotonic()
+
+    def _open(self) -> None:
+        if self._file is None:
+            self._file = open(self.filename, "ab", buffering=self.buffer_size)
+
+    def _write(self, log_level: LogLevel, data: bytes) -> None:
+        self._open()
+        self._file.write(data)
+        self._pending += 1
+
+        if self._should_flush(log_level):
+            self._flush()
+
+    def _should_flush(self, log_level: LogLevel) -> bool:
+        if self.flush_every is not None and self._pending >= self.flush_every:
+            return True
+
+        if (self.flush_level is not None
+                and LEVELS_ORDER[log_level] >= LEVELS_ORDER[self.flush_level]):
+            return True
+
+        return (self.flush_interval is not None
+                and time.monotonic() - self._last_flush >= self.flush_interval)
+
+    def _flush(self) -> None:
+        if self._file is not None and self._pending:
+            self._file.flush()
+
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def close(self) -> None:
+        if self._flusher is not None:
+            atexit.unregister(self.close)
+            self._closing.set()
+            self._dirty.set()
+            self._flusher.join()
+            self._flusher = None
+            self._closing.clear()
+            self._dirty.clear()
+
+        with self._lock:
+            if self._file is not None:
+                self._flush()
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+class RotatingFileHandler(FileHandler):
+    """
+    Ротация по размеру (max_bytes) и/или по времени (interval, секунды).
+    Ротированные сегменты сжимаются gzip и удаляются по backup_count/max_age
+    в фоновом потоке, поэтому запись лога не ждет сжатия
+    """
+
+    def __init__(self, filename: str,
+                 max_bytes: Optional[int] = None,
+                 interval: Optional[float] = None,
+                 backup_count: Optional[int] = None,
+                 max_age: Optional[float] = None,
+                 compress: bool = True,
+                 flush_every: Optional[int] = 1,
+                 flush_interval_ms: Optional[float] = None,
+                 flush_level: Optional[LogLevel] = LogLevel.ERROR,
+                 fsync: bool = False,
+                 buffer_size: int = 64 * 1024) -> None:
+        super().__init__(filename, flush_every, flush_interval_ms,
+                         flush_level, fsync, buffer_size)
+
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError("max_bytes must be positive")
+
+        if interval is not None and interval <= 0:
+            raise ValueError("interval must be positive")
+
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backup_count = backup_count
+        self.max_age = max_age
+        self.compress = compress
+        self.errors = 0
+
+        self._size = os.path.getsize(filename) if os.path.isfile(filename) else 0
+        self._rollover_at = time.time() + interval if interval is not None else None
+        self._segments: RecordQueue[str] = RecordQueue(1024)
+        self._maintainer: Optional[threading.Thread] = None
+        # сегменты, еще ждущие сжатия: очистка по хранению их не трогает
+        self._queued: set[str] = set()
+        self._queued_lock = threading.Lock()
+        self._segment_pattern = re.compile(
+            rf"{re.escape(os.path.basename(filename))}\.(\d{{8}}-\d{{6}}-\d{{6}})(?:-(\d+))?(?:\.gz)?"
+        )
+
+    def handle_batch(self, records: list[tuple[LogLevel, bytes]]) -> None:
+        # ротация проверяется на каждой записи, поэтому без writev
+        LogBytesHandlerProtocol.handle_batch(self, records)
+
+    def _write(self, log_level: LogLevel, data: bytes) -> None:
+        if self._should_rotate(len(data)):
+            self._rotate()
+
+        super()._write(log_level, data)
+        self._size += len(data)
 
+    def _should_rotate(self, length: int) -> bool:
+        if self.max_bytes is not None and self._size and self._size + length > self.max_bytes:
+            return True
+
+        return self._rollover_at is not None and time.time() >= self._rollover_at
+
+    def _rotate(self) -> None:
+        if self._file is not None:
+            self._flush()
+            self._file.close()
+            self._file = None
+
+        if self.interval is not None:
+            self._rollover_at = time.time() + self.interval
+
+        self._size = 0
+
+        if not os.path.exists(self.filename):
+            return
+
+        segment = stamp = f"{self.filename}.{datetime.now():%Y%m%d-%H%M%S-%f}"
+        suffix = 0
+
+        while os.path.exists(segment) or os.path.exists(f"{segment}.gz"):
+            suffix += 1
+            segment = f"{stamp}-{suffix}"
+
+        with self._queued_lock:
+            self._queued.add(segment)
+
+        os.replace(self.filename, segment)
+
+        if self._maintainer is None:
+            self._maintainer = threading.Thread(target=self._maintain,
+                                                name="RotatingFileHandler", daemon=True)
+            self._maintainer.start()
+
+        self._segments.put(segment)
+
+    def _maintain(self) -> None:
+        while True:
+            segments = self._segments.get_batch(16)
+
+            if not segments and self._segments.closed:
+                return
+
+            for segment in segments:
+                try:
+                    if self.compress:
+                        self._compress(segment)
+
+                except Exception as ex:
+                    self.errors += 1
+                    print(f"[!] RotatingFileHandler error: {ex}")
+
+                with self._queued_lock:
+                    self._queued.discard(segment)
+
+            # очистка один раз на пачку, после сжатия всех ее сегментов
+            try:
+                self._prune()
+            except Exception as ex:
+                self.errors += 1
+                print(f"[!] RotatingFileHandler error: {ex}")
+
+            self._segments.task_done(len(segments))
+
+    @staticmethod
+    def _compress(segment: str) -> None:
+        temp = f"{segment}.gz.tmp"
+
+        with open(segment, "rb") as source, gzip.open(temp, "wb") as target:
+            while chunk := source.read(1024 * 1024):
+                target.write(chunk)
+
+        os.replace(temp, f"{segment}.gz")
+        os.remove(segment)
+
+    def rotated_segments(self) -> list[str]:
+        """Сегменты этого обработчика (<имя>.ГГГГММДД-ЧЧММСС-мкс[-N][.gz]) от старых к новым"""
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        found: list[tuple[str, int, str]] = []
+
+        for name in os.listdir(directory):
+            match = self._segment_pattern.fullmatch(name)
+
+            if match is not None:
+                stamp, suffix = match.groups()
+                found.append((stamp, int(suffix or 0), os.path.join(directory, name)))
+
+        return [path for *_, path in sorted(found)]
+
+    def _prune(self) -> None:
+        with self._queued_lock:
+            queued = set(self._queued)
+
+        segments = self.rotated_segments()
+        expired: list[str] = []
+
+        if self.backup_count is not None:
+            keep = max(len(segments) - self.backup_count, 0)
+            expired, segments = segments[:keep], segments[keep:]
+
+        if self.max_age is not None:
+            deadline = time.time() - self.max_age
+            expired += [path for path in segments if os.path.getmtime(path) < deadline]
+
+        for path in expired:
+            if path not in queued:
+                os.remove(path)
+
+    def flush_segments(self, timeout: Optional[float] = None) -> bool:
+        return self._segments.join(timeout)
+
+    def close(self) -> None:
+        super().close()
+
+        self._segments.close()
+
+        if self._maintainer is not None:
+            self._maintainer.join()
+
+
+class SocketHandler(LogHandlerProtocol, LogBytesHandlerProtocol):
+    """
+    Держит одно TCP-соединение и отправляет записи пачками из фонового
+    потока одним sendmsg без склейки. При обрыве переподключается
+    с экспоненциальной задержкой, а записи копятся в ограниченной
+    очереди (старые вытесняются)
+    """
+
+    def __init__(self, host: str, port: int,
+                 batch_size: int = 256,
+                 capacity: int = 10_000,
+                 backoff_initial: float = 0.1,
+                 backoff_max: float = 5.0,
+                 timeout: float = 5.0) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
 
-class FtpHandler(LogHandlerProtocol):
-    def __init__(self, host: str, port: int, username: str, password: str) -> None:
         self.host = host
         self.port = port
-        self.username = username
-        self.password = password
+        self.batch_size = batch_size
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.errors = 0
+        self.reconnects = 0
+
+        self.queue: RecordQueue[bytes] = RecordQueue(capacity, OverflowPolicy.DROP_OLDEST)
+        self._sock: Optional[socket] = None
+        self._closing = threading.Event()
+        self._sender: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def dropped(self) -> int:
+        return self.queue.dropped
 
     def handle(self, log_level: LogLevel, text: str) -> None:
+        self.handle_bytes(log_level, f"{text}\n".encode("utf-8"))
+
+    def handle_bytes(self, log_level: LogLevel, data: bytes) -> None:
+        if self._sender is None:
+            self._start()
+
+        self.queue.put(data)
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._sender is None:
+                self._sender = threading.Thread(target=self._run, name="SocketHandler",
+                                                daemon=True)
+                self._sender.start()
+
+    def _connect(self) -> socket:
+        sock = socket(AF_INET, SOCK_STREAM)
+
         try:
-            with FTP(self.host) as ftp:
-                ftp.login(self.username, self.password)
+            sock.settimeout(self.timeout)
+            sock.connect((self.host, self.port))
+        except OSError:
+            sock.close()
+            raise
 
-                tempfile = f"temp_log_{datetime.now().timestamp()}.txt"
+        self.reconnects += 1
+        return sock
 
-                with open(tempfile, "w", encoding="utf-8") as file:
-                    file.write(f"{text}\n")
+    def _disconnect(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
 
-                with open(tempfile, "rb") as file:
-                    ftp.storbinary(f"STOR {tempfile}", file)
+    def _run(self) -> None:
+        batch: list[bytes] = []
+        delay = self.backoff_initial
+        failing = False
 
-        except Exception as ex:
-            print(f"[!] FTPHandler error: {ex}")
+        while True:
+            if not batch:
+                batch = self.queue.get_batch(self.batch_size)
 
+                if not batch:
+                    break
 
-# endregion
+            try:
+                if self._sock is None:
+                    self._sock = self._connect()
 
-# region Formatter classes
+                # при обрыве посреди отправки пачка отправляется повторно целиком
+                self._send(self._sock, batch)
 
-class StandardFormatter(LogFormatterProtocol):
-    def format(self, log_level: LogLevel, text: str) -> str:
-        current_time = datetime.now().strftime("%Y.%m.%d %H:%M:%S")
-        return f"{log_level.value} [{current_time}] {text}"
+            except OSError as ex:
+                self.errors += 1
+                self._disconnect()
 
+                if not failing:
+                    print(f"[!] SocketHandler error: {ex}")
+                    failing = True
 
-# endregion
+                if self._closing.is_set():
+                    self._discard(batch)
+                    break
 
-class Logger:
-    def __init__(self, filters: Optional[list[LogFilterProtocol]] = None,
-                 handlers: Optional[list[LogHandlerProtocol]] = None,
-                 formatters: Optional[list[LogFormatterProtocol]] = None) -> None:
-        self.filters = filters.copy() if filters else []
-        self.handlers = handlers.copy() if handlers else []
-        self.formatters = formatters.copy() if formatters else []
+                self._closing.wait(delay)
+                delay = min(delay * 2, self.backoff_max)
+                continue
 
-    def log(self, log_level: LogLevel, text: str) -> None:
-        try:
-            text = str(text)
+            self.queue.task_done(len(batch))
+            batch = []
+            delay = self.backoff_initial
+            failing = False
 
-            for _filter in self.filters:
-                if not _filter.match(log_level, text):
-                    raise Exception(f"[!] Filter {_filter.__class__.__name__} failed")
+        self._disconnect()
 
-            formatted_text = text
+    @staticmethod
+    def _send(sock: socket, batch: list[bytes]) -> None:
+        if hasattr(sock, "sendmsg"):
+            _scatter_write(sock.sendmsg, batch)
+        else:
+            sock.sendall(b"".join(batch))
 
-            for _formatter in self.formatters:
-                formatted_text = _formatter.format(log_level, formatted_text)
+    def _discard(self, batch: list[bytes]) -> None:
+        while batch:
+            self.queue.dropped += len(batch)
+            self.queue.task_done(len(batch))
+            batch = self.queue.get_batch(self.queue.capacity)
 
-            for _handler in self.handlers:
-                _handler.handle(log_level, formatted_text)
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        return self.queue.join(timeout)
 
-        except Exception as ex:
-            raise ex
+    def close(self, timeout: Optional[float] = None) -> None:
+        self._closing.set()
+        self.queue.close()
+
+        if self._sender is not None:
+            self._sender.join(timeout)
+
+
+class SysLogHandler(LogHandlerProtocol):
+    def handle(self, log_level: LogLevel, text: str) -> None:
+        sys.stderr.write(f"SYSLOG: {text}\n")
+
+
+class FtpHandler(LogHandlerProtocol, LogBytesHandlerProtocol):
+    """
+    Копит записи в памяти и выгружает их сегментом по batch_size записей
+    или раз в flush_interval секунд через одну переиспользуемую FTP-сессию.
+    Выгрузка идет в фоновом потоке, при ошибке сегмент остается в буфере,
+    а следующая попытка делается не раньше чем через экспоненциально
+    растущую паузу. В буфере не больше max_buffered записей, старые
+    вытесняются и учитываются в dropped
+    """
+
+    def __init__(self, host: str, port: int, username: str, password: str,
+                 batch_size: int = 1000,
+                 flush_interval: Optional[float] = 60.0,
+                 max_buffered: int = 100_000,
+                 prefix: str = "log",
+                 timeout: float = 30.0,
+                 backoff_initial: float = 1.0,
+                 backoff_max: float = 60.0,
+                 ftp_factory: Optional[Callable[[], FTP]] = None) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+
+        if max_buffered < batch_size:
+            raise ValueError("max_buffered must not be less than batch_size")
+
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self.prefix = prefix
+        self.timeout = timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.ftp_factory = ftp_factory or FTP
+        self.errors = 0
+        self.uploads = 0
+        self.dropped = 0
+
+        self._buffer: deque[bytes] = deque()
+        self._delay = backoff_initial
+        self._retry_at = 0.0
+        self._failing = False
+        self._segment = 0
+        self._ftp: Optional[FTP] = None
+        self._lock = threading.Lock()
+        self._upload_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closing = threading.Event()
+        self._uploader: Optional[threading.Thread] = None
+
+    def handle(self, log_level: LogLevel, text: str) -> None:
+        self.handle_bytes(log_level, f"{text}\n".encode("utf-8"))
+
+    def handle_bytes(self, log_level: LogLevel, data: bytes) -> None:
+        with self._lock:
+            if self._uploader is None:
+                self._uploader = threading.Thread(target=self._run, name="FtpHandler",
+                                                  daemon=True)
+                self._uploader.start()
+
+            if len(self._buffer) >= self.max_buffered:
+                self._buffer.popleft()
+                self.dropped += 1
+
+            self._buffer.append(data)
+
+            # во время паузы после ошибки поток выгрузки не будится
+            if len(self._buffer) >= self.batch_size and time.monotonic() >= self._retry_at:
+                self._wakeup.set()
+
+    def _run(self) -> None:
+        while not self._closing.is_set():
+            delay = self._retry_at - time.monotonic()
+
+            if delay > 0:
+                # сервер недоступен: повтор полных сегментов по окончании паузы
+                self._closing.wait(delay)
+                filled = True
+            else:
+                # по заполнению выгружаются только полные сегменты, по таймеру - все
+                filled = self._wakeup.wait(self.flush_interval)
+
+            self._wakeup.clear()
+            self._upload(full_only=filled and not self._closing.is_set())
+
+    def _connect(self) -> FTP:
+        ftp = self.ftp_factory()
+        ftp.connect(self.host, self.port, timeout=self.timeout)
+        ftp.login(self.username, self.password)
+
+        return ftp
+
+    def _disconnect(self) -> None:
+        if self._ftp is not None:
+            try:
+                self._ftp.quit()
+            except Exception:
+                self._ftp.close()
+
+            self._ftp = None
+
+    def _store(self, name: str, data: bytes) -> None:
+        if self._ftp is not None:
+            try:
+                self._ftp.storbinary(f"STOR {name}", io.BytesIO(data))
+                return
+            except Exception:
+                # сессия могла устареть: одна повторная попытка с новым подключением
+                self._disconnect()
+
+        self._ftp = self._connect()
+        self._ftp.storbinary(f"STOR {name}", io.BytesIO(data))
+
+    def flush(self) -> bool:
+        return self._upload(full_only=False)
+
+    def _upload(self, full_only: bool) -> bool:
+        with self._upload_lock:
+            while True:
+                with self._lock:
+                    if full_only and len(self._buffer) < self.batch_size:
+                        return True
+
+                    lines = [self._buffer.popleft()
+                             for _ in range(min(self.batch_size, len(self._buffer)))]
+
+                if not lines:
+                    return True
+
+                self._segment += 1
+                name = f"{self.prefix}_{datetime.now():%Y%m%d-%H%M%S}_{self._segment:06d}.txt"
+
+                try:
+                    self._store(name, b"".join(lines))
+                    self.uploads += 1
+                    self._delay = self.backoff_initial
+                    self._retry_at = 0.0
+                    self._failing = False
+
+                except Exception as ex:
+                    self.errors += 1
+
+                    if not self._failing:
+                        print(f"[!] FTPHandler error: {ex}")
+                        self._failing = True
+
+                    self._retry_at = time.monotonic() + self._delay
+                    self._delay = min(self._delay * 2, self.backoff_max)
+
+                    with self._lock:
+                        # сегмент возвращается в начало буфера, лишние старые записи теряются
+                        overflow = len(self._buffer) + len(lines) - self.max_buffered
+
+                        if overflow > 0:
+                            del lines[:overflow]
+                            self.dropped += overflow
+
+                        self._buffer.extendleft(reversed(lines))
+
+                    return False
+
+    def close(self) -> None:
+        self._closing.set()
+        self._wakeup.set()
+
+        if self._uploader is not None:
+            self._uploader.join()
+
+        self.flush()
+        self._disconnect()
+
+
+class CollectorHandler(LogHandlerProtocol):
+    """Обработчик рабочего процесса: передает запись процессу LogCollector"""
+
+    def __init__(self, records: "multiprocessing.Queue[Optional[tuple[int, str]]]",
+                 timeout: Optional[float] = None) -> None:
+        self.records = records
+        self.timeout = timeout
+        self.dropped = 0
+
+    def handle(self, log_level: LogLevel, text: str) -> None:
+        try:
+            self.records.put((LEVEL_CODES[log_level], text), timeout=self.timeout)
+        except queue.Full:
+            self.dropped += 1
+
+
+# Формат бинарного лога: сигнатура, затем записи
+# [длина сообщения u32][время ns i64][код уровня u8][сообщение utf-8].
+# Индекс (<файл>.idx) хранит по записи на блок из index_every записей:
+# [смещение u64][конец u64][первое время i64][последнее время i64][число u32][маска уровней u8]
+BINARY_LOG_MAGIC = b"LAB3BIN1"
+BINARY_RECORD = struct.Struct("<IqB")
+BINARY_INDEX_ENTRY = struct.Struct("<QQqqIB")
+
+
+class BinaryFileHandler(LogHandlerProtocol):
+    def __init__(self, filename: str, index_every: int = 1024,
+                 buffer_size: int = 64 * 1024) -> None:
+        if index_every < 1:
+            raise ValueError("index_every must be positive")
+
+        self.filename = filename
+        self.index_filename = f"{filename}.idx"
+        self.index_every = index_every
+        self.buffer_size = buffer_size
+
+        self._file: Optional[BinaryIO] = None
+        self._index: Optional[BinaryIO] = None
+        self._offset = 0
+        self._block: list[int] = []
+        self._lock = threading.Lock()
+
+    def _open(self) -> None:
+        if os.path.exists(self.filename):
+            self._recover()
+
+        self._file = open(self.filename, "ab", buffering=self.buffer_size)
+        self._index = open(self.index_filename, "ab")
+        self._offset = self._file.tell()
+
+        if self._offset == 0:
+            self._file.write(BINARY_LOG_MAGIC)
+            self._offset = len(BINARY_LOG_MAGIC)
+
+    def _recover(self) -> None:
+        """
+        Дописывает индекс для записей прошлого запуска, не вызвавшего close(),
+        и отрезает недописанную последнюю запись. Неполный хвостовой блок
+        продолжается новыми записями
+        """
+        with open(self.filename, "r+b") as file:
+            magic = file.read(len(BINARY_LOG_MAGIC))
+
+            if len(magic) < len(BINARY_LOG_MAGIC):
+                # не дописана даже сигнатура: файл и индекс начинаются заново
+                file.truncate(0)
+                open(self.index_filename, "wb").close()
+                return
+
+            if magic != BINARY_LOG_MAGIC:
+                raise ValueError(f"{self.filename} is not a binary log")
+
+            size = os.fstat(file.fileno()).st_size
+            entries: list[tuple[int, int, int, int, int, int]] = []
+
+            if os.path.exists(self.index_filename):
+                with open(self.index_filename, "rb") as index:
+                    data = index.read()
+
+                usable = len(data) - len(data) % BINARY_INDEX_ENTRY.size
+
+                for entry in BINARY_INDEX_ENTRY.iter_unpack(data[:usable]):
+                    if entry[1] > size:
+                        break
+
+                    entries.append(entry)
+
+            offset = entries[-1][1] if entries else len(BINARY_LOG_MAGIC)
+            file.seek(offset)
+            tail = file.read()
+            position = 0
+            block: list[int] = []
+            recovered: list[bytes] = []
+
+            while position + BINARY_RECORD.size <= len(tail):
+                length, timestamp, code = BINARY_RECORD.unpack_from(tail, position)
+                end = position + BINARY_RECORD.size + length
+
+                if code >= len(LEVELS_BY_CODE) or end > len(tail):
+                    break
+
+                if not block:
+                    block = [offset + position, timestamp, timestamp, 0, 0]
+
+                block[2] = timestamp
+                block[3] += 1
+                block[4] |= 1 << code
+                position = end
+
+                if block[3] >= self.index_every:
+                    start, first, last, count, mask = block
+                    recovered.append(BINARY_INDEX_ENTRY.pack(start, offset + position,
+                                                             first, last, count, mask))
+                    block = []
+
+            if offset + position < size:
+                file.truncate(offset + position)
+
+        with open(self.index_filename, "ab") as index:
+            index.truncate(len(entries) * BINARY_INDEX_ENTRY.size)
+            index.write(b"".join(recovered))
+
+        self._block = block
+
+    def handle(self, log_level: LogLevel, text: str) -> None:
+        payload = text.encode("utf-8")
+        code = LEVEL_CODES[log_level]
+        timestamp = time.time_ns()
+
+        with self._lock:
+            if self._file is None:
+                self._open()
+
+            if not self._block:
+                # [начало блока, первое время, последнее время, число записей, маска]
+                self._block = [self._offset, timestamp, timestamp, 0, 0]
+
+            self._file.write(BINARY_RECORD.pack(len(payload), timestamp, code))
+            self._file.write(payload)
+            self._offset += BINARY_RECORD.size + len(payload)
+
+            block = self._block
+            block[2] = timestamp
+            block[3] += 1
+            block[4] |= 1 << code
+
+            if block[3] >= self.index_every:
+                self._close_block()
+
+    def _close_block(self) -> None:
+        if self._block:
+            start, first, last, count, mask = self._block
+            self._index.write(BINARY_INDEX_ENTRY.pack(start, self._offset, first, last, count, mask))
+            self._block = []
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                # данные сбрасываются раньше индекса: индекс не ссылается на недописанное
+                self._file.flush()
+                self._index.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                # данные сбрасываются раньше индекса: индекс не ссылается на недописанное
+                self._file.flush()
+                self._close_block()
+                self._file.close()
+                self._index.close()
+                self._file = self._index = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+# Формат кольцевого лога: сигнатура, заголовок [емкость u64][голова u64][курсор u64],
+# затем область данных емкостью capacity байт. Голова и курсор — логические
+# (монотонно растущие) смещения, физическое место записи — смещение по модулю емкости.
+# Записи имеют формат BINARY_RECORD + сообщение и могут переходить через конец области
+RING_LOG_MAGIC = b"LAB3RNG1"
+RING_HEADER = struct.Struct("<QQQ")
+RING_DATA_OFFSET = len(RING_LOG_MAGIC) + RING_HEADER.size
+_RING_HEAD_OFFSET = len(RING_LOG_MAGIC) + 8
+_RING_CURSOR_OFFSET = len(RING_LOG_MAGIC) + 16
+
+
+def _ring_read(data: bytes | mmap.mmap, capacity: int, position: int, size: int) -> bytes:
+    start = RING_DATA_OFFSET + position % capacity
+    first = min(size, RING_DATA_OFFSET + capacity - start)
+    return data[start:start + first] + data[RING_DATA_OFFSET:RING_DATA_OFFSET + size - first]
+
+
+def _ring_records(data: bytes | mmap.mmap, capacity: int, head: int,
+                  cursor: int) -> Iterator[tuple[int, int, int, bytes]]:
+    """Записи между головой и курсором: (логическое смещение, время ns, код уровня, сообщение)"""
+    position = head
+
+    while position + BINARY_RECORD.size <= cursor:
+        length, timestamp, code = BINARY_RECORD.unpack(
+            _ring_read(data, capacity, position, BINARY_RECORD.size)
+        )
+        end = position + BINARY_RECORD.size + length
+
+        if end > cursor or code >= len(LEVELS_BY_CODE):
+            return  # поврежденный заголовок записи
+
+        yield position, timestamp, code, _ring_read(data, capacity, end - length, length)
+        position = end
+
+
+class RingBufferHandler(LogHandlerProtocol):
+    """
+    Последние capacity байт лога в файле фиксированного размера через mmap.
+    Запись попадает в страничный кэш без системных вызовов и переживает
+    аварийное завершение процесса. Голова сдвигается до записи данных,
+    курсор — после, поэтому область [голова, курсор) всегда целостна.
+    При записи уровня dump_level и выше кольцо выгружается в dump_handler
+    """
+
+    def __init__(self, filename: str, capacity: int = 4 * 1024 * 1024,
+                 dump_handler: Optional[LogHandlerProtocol] = None,
+                 dump_level: LogLevel = LogLevel.CRITICAL) -> None:
+        if capacity <= BINARY_RECORD.size:
+            raise ValueError(f"capacity must exceed {BINARY_RECORD.size} bytes")
+
+        self.filename = filename
+        self.capacity = capacity
+        self.dump_handler = dump_handler
+        self.dump_level = dump_level
+
+        self._file: Optional[BinaryIO] = None
+        self._map: Optional[mmap.mmap] = None
+        self._head = self._cursor = self._dumped = 0
+        self._starts: deque[int] = deque()
+        self._lock = threading.Lock()
+
+    def _open(self) -> None:
+        size = RING_DATA_OFFSET + self.capacity
+        self._file = open(self.filename, "a+b")
+
+        if os.fstat(self._file.fileno()).st_size != size:
+            self._file.truncate(0)
+            self._file.truncate(size)
+
+        self._map = mmap.mmap(self._file.fileno(), size)
+
+        if self._map[:len(RING_LOG_MAGIC)] == RING_LOG_MAGIC:
+            capacity, head, cursor = RING_HEADER.unpack_from(self._map, len(RING_LOG_MAGIC))
+
+            if capacity == self.capacity and head <= cursor <= head + capacity:
+                # продолжаем кольцо, оставшееся от прошлого запуска
+                self._head = self._cursor = head
+
+                for start, _, _, payload in _ring_records(self._map, capacity, head, cursor):
+                    self._starts.append(start)
+                    self._cursor = start + BINARY_RECORD.size + len(payload)
+
+        self._map[:len(RING_LOG_MAGIC)] = RING_LOG_MAGIC
+        RING_HEADER.pack_into(self._map, len(RING_LOG_MAGIC), self.capacity, self._head, self._cursor)
+        self._dumped = self._cursor
+
+    def _write(self, position: int, chunk: bytes) -> None:
+        start = RING_DATA_OFFSET + position % self.capacity
+        first = min(len(chunk), RING_DATA_OFFSET + self.capacity - start)
+        self._map[start:start + first] = chunk[:first]
+
+        if first < len(chunk):
+            self._map[RING_DATA_OFFSET:RING_DATA_OFFSET + len(chunk) - first] = chunk[first:]
+
+    def handle(self, log_level: LogLevel, text: str) -> None:
+        payload = text.encode("utf-8")[:self.capacity - BINARY_RECORD.size]
+        record = BINARY_RECORD.pack(len(payload), time.time_ns(), LEVEL_CODES[log_level]) + payload
+
+        with self._lock:
+            if self._map is None:
+                self._open()
+
+            end = self._cursor + len(record)
+
+            if end - self._head > self.capacity:
+                starts = self._starts
+
+                while starts and end - starts[0] > self.capacity:
+                    starts.popleft()
+
+                self._head = starts[0] if starts else self._cursor
+                struct.pack_into("<Q", self._map, _RING_HEAD_OFFSET, self._head)
+
+            self._write(self._cursor, record)
+            self._starts.append(self._cursor)
+            self._cursor = end
+            struct.pack_into("<Q", self._map, _RING_CURSOR_OFFSET, end)
+
+            if (self.dump_handler is not None
+                    and LEVELS_ORDER[log_level] >= LEVELS_ORDER[self.dump_level]):
+                self._dump()
+
+    def _dump(self) -> None:
+        """Выгружает записи, еще не выгруженные прошлыми дампами"""
+        begin = max(self._head, self._dumped)
+
+        for _, _, code, payload in _ring_records(self._map, self.capacity, begin, self._cursor):
+            self.dump_handler.handle(LEVELS_BY_CODE[code], payload.decode("utf-8", "replace"))
+
+        self._dumped = self._cursor
+        flush = getattr(self.dump_handler, "flush", None)
+
+        if flush is not None:
+            flush()
+
+    def flush(self) -> None:
+        """Синхронно сбрасывает страницы на диск (нужно только на случай сбоя ОС)"""
+        with self._lock:
+            if self._map is not None:
+                self._map.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._file.close()
+                self._map = self._file = None
+                self._starts.clear()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+class AsyncFileHandler(AsyncLogHandlerProtocol):
+    """
+    Записи копятся в памяти, а запись на диск выполняется в пуле потоков
+    пачкой из flush_every записей или сразу на уровне flush_level и выше.
+    Цикл событий не блокируется файловым вводом-выводом
+    """
+
+    def __init__(self, filename: str,
+                 flush_every: int = 100,
+                 flush_level: Optional[LogLevel] = LogLevel.ERROR,
+                 buffer_size: int = 64 * 1024) -> None:
+        if flush_every < 1:
+            raise ValueError("flush_every must be positive")
+
+        self.filename = filename
+        self.flush_every = flush_every
+        self.flush_level = flush_level
+        self.buffer_size = buffer_size
+
+        self._file: Optional[TextIO] = None
+        self._buffer: list[str] = []
+        self._lock = asyncio.Lock()
+
+    async def handle(self, log_level: LogLevel, text: str) -> None:
+        self._buffer.append(f"{text}\n")
+
+        if (len(self._buffer) >= self.flush_every
+                or (self.flush_level is not None
+                    and LEVELS_ORDER[log_level] >= LEVELS_ORDER[self.flush_level])):
+            await self.flush()
+
+    def _write(self, chunk: str) -> None:
+        if self._file is None:
+            self._file = open(self.filename, "a", encoding="utf-8",
+                              buffering=self.buffer_size)
+
+        self._file.write(chunk)
+        self._file.flush()
+
+    async def flush(self) -> None:
+        # блокировка сохраняет порядок пачек при конкурентных сбросах
+        async with self._lock:
+            if self._buffer:
+                chunk = "".join(self._buffer)
+                self._buffer.clear()
+                await asyncio.get_running_loop().run_in_executor(None, self._write, chunk)
+
+    async def close(self) -> None:
+        await self.flush()
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        await self.close()
+
+
+class AsyncSocketHandler(AsyncLogHandlerProtocol):
+    """
+    TCP-отправка через asyncio streams. Запись ждет drain, только когда
+    буфер транспорта переполнен. После обрыва новое подключение пробуется
+    не раньше чем через экспоненциально растущую паузу; записи в это время
+    отбрасываются и учитываются в dropped
+    """
+
+    def __init__(self, host: str, port: int,
+                 backoff_initial: float = 0.1,
+                 backoff_max: float = 5.0,
+                 timeout: float = 5.0) -> None:
+        self.host = host
+        self.port = port
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.errors = 0
+        self.reconnects = 0
+        self.dropped = 0
+
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._delay = backoff_initial
+        self._retry_at = 0.0
+        self._failing = False
+        self._lock = asyncio.Lock()
+
+    async def handle(self, log_level: LogLevel, text: str) -> None:
+        async with self._lock:
+            if self._writer is None and not await self._connect():
+                self.dropped += 1
+                return
+
+            try:
+                self._writer.write(f"{text}\n".encode("utf-8"))
+                await self._writer.drain()
+            except OSError as ex:
+                self._fail(ex)
+                self.dropped += 1
+
+    async def _connect(self) -> bool:
+        loop = asyncio.get_running_loop()
+
+        if loop.time() < self._retry_at:
+            return False
+
+        try:
+            _, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout
+            )
+        except (OSError, asyncio.TimeoutError) as ex:
+            self._fail(ex)
+            return False
+
+        self.reconnects += 1
+        self._delay = self.backoff_initial
+        self._failing = False
+        return True
+
+    def _fail(self, ex: Exception) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+        if not self._failing:
+            print(f"[!] AsyncSocketHandler error: {ex!r}")
+            self._failing = True
+
+        self.errors += 1
+        self._retry_at = asyncio.get_running_loop().time() + self._delay
+        self._delay = min(self._delay * 2, self.backoff_max)
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self._writer is not None:
+                writer, self._writer = self._writer, None
+                writer.close()
+
+                try:
+                    await writer.wait_closed()
+                except OSError:
+                    pass
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        await self.close()
+
+
+class HandlerHealth(Enum):
+    HEALTHY = "healthy"
+    BACKLOGGED = "backlogged"
+    FAILING = "failing"
+    STOPPED = "stopped"
+
+
+class HandlerWorker(LogHandlerProtocol):
+    """
+    Обертка, выполняющая обработчик в собственном потоке со своей
+    ограниченной очередью. Медленный или падающий обработчик копит
+    очередь и теряет записи по своей политике, не задерживая остальных
+    """
+
+    def __init__(self, handler: LogHandlerProtocol,
+                 capacity: int = 10_000,
+                 policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+                 batch_size: int = 256,
+                 put_timeout: Optional[float] = None,
+                 failure_threshold: int = 3,
+                 backlog_ratio: float = 0.8) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+
+        self.handler = handler
+        self.name = f"{handler.__class__.__name__}@{id(handler):x}"
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self.failure_threshold = failure_threshold
+        self.backlog_ratio = backlog_ratio
+        self.handled = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.last_error: Optional[str] = None
+
+        self.queue: RecordQueue[tuple[LogLevel, str]] = RecordQueue(capacity, policy)
+        self._worker = threading.Thread(target=self._run, name=f"HandlerWorker-{self.name}",
+                                        daemon=True)
+        self._worker.start()
+
+    @property
+    def dropped(self) -> int:
+        return self.queue.dropped
+
+    @property
+    def health(self) -> HandlerHealth:
+        if self.queue.closed:
+            return HandlerHealth.STOPPED
+
+        if self.consecutive_errors >= self.failure_threshold:
+            return HandlerHealth.FAILING
+
+        if len(self.queue) >= self.queue.capacity * self.backlog_ratio:
+            return HandlerHealth.BACKLOGGED
+
+        return HandlerHealth.HEALTHY
+
+    def status(self) -> dict[str, object]:
+        return {
+            "health": self.health.value,
+            "queued": len(self.queue),
+            "capacity": self.queue.capacity,
+            "handled": self.handled,
+            "errors": self.errors,
+            "dropped": self.dropped,
+            "last_error": self.last_error,
+        }
+
+    def handle(self, log_level: LogLevel, text: str) -> None:
+        self.queue.put((log_level, text), self.put_timeout)
+
+    def _run(self) -> None:
+        while True:
+            batch = self.queue.get_batch(self.batch_size)
+
+            if not batch and self.queue.closed:
+                return
+
+            self._deliver(batch)
+            self.queue.task_done(len(batch))
+
+    def _deliver(self, batch: list[tuple[LogLevel, str]]) -> None:
+        for log_level, text in batch:
+            self._call(self.handler.handle, 1, log_level, text)
+
+    def _call(self, method: Callable[..., None], records: int, *args: object) -> None:
+        try:
+            method(*args)
+        except Exception as ex:
+            self.errors += 1
+            self.consecutive_errors += 1
+            self.last_error = repr(ex)
+
+            if self.consecutive_errors == 1:
+                print(f"[!] HandlerWorker {self.name} error: {ex}")
+        else:
+            self.handled += records
+            self.consecutive_errors = 0
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        return self.queue.join(timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        self.queue.close()
+        self._worker.join(timeout)
+
+        close = getattr(self.handler, "close", None)
+
+        if close is not None and not self._worker.is_alive():
+            close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+class BytesHandlerWorker(HandlerWorker, LogBytesHandlerProtocol):
+    """
+    HandlerWorker для байтового обработчика: в очередь кладутся уже
+    закодированные записи, а рабочий поток отдает их пачкой в handle_batch
+    """
+
+    handler: LogBytesHandlerProtocol
+
+    def handle(self, log_level: LogLevel, text: str) -> None:
+        self.handle_bytes(log_level, f"{text}\n".encode("utf-8"))
+
+    def handle_bytes(self, log_level: LogLevel, data: bytes) -> None:
+        self.queue.put((log_level, data), self.put_timeout)
+
+    def _deliver(self, batch: list[tuple[LogLevel, bytes]]) -> None:
+        self._call(self.handler.handle_batch, len(batch), batch)
+
+
+class CompressionMethod(Enum):
+    GZIP = "gzip"
+    LZMA = "xz"
+
+
+COMPRESSION_MAGIC: dict[CompressionMethod, bytes] = {
+    CompressionMethod.GZIP: b"\x1f\x8b",
+    CompressionMethod.LZMA: b"\xfd7zXZ\x00",
+}
+
+
+class CompressedFileHandler(LogHandlerProtocol, LogBytesHandlerProtocol):
+    """
+    Сжатый лог из независимых блоков: каждые block_size байт записей
+    (или раньше — на уровне flush_level и выше) сжимаются отдельным
+    членом gzip/xz и дописываются в файл. Завершенные блоки можно читать,
+    пока файл еще пишется; файл целиком читается gzip.open/lzma.open
+    """
+
+    def __init__(self, filename: str,
+                 method: CompressionMethod = CompressionMethod.GZIP,
+                 level: Optional[int] = None,
+                 block_size: int = 1024 * 1024,
+                 flush_level: Optional[LogLevel] = LogLevel.ERROR) -> None:
+        if block_size < 1:
+            raise ValueError("block_size must be positive")
+
+        self.filename = filename
+        self.method = method
+        self.level = level
+        self.block_size = block_size
+        self.flush_level = flush_level
+        self.blocks = 0
+        self.raw_bytes = 0
+        self.compressed_bytes = 0
+        self.cpu_seconds = 0.0
+
+        self._file: Optional[BinaryIO] = None
+        self._block: list[bytes] = []
+        self._buffered = 0
+        self._lock = threading.Lock()
+
+    def handle(self, log_level: LogLevel, text: str) -> None:
+        self.handle_bytes(log_level, f"{text}\n".encode("utf-8"))
+
+    def handle_bytes(self, log_level: LogLevel, data: bytes) -> None:
+        with self._lock:
+            self._block.append(data)
+            self._buffered += len(data)
+
+            if (self._buffered >= self.block_size
+                    or (self.flush_level is not None
+                        and LEVELS_ORDER[log_level] >= LEVELS_ORDER[self.flush_level])):
+                self._write_block()
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.method is CompressionMethod.LZMA:
+            return lzma.compress(data, format=lzma.FORMAT_XZ,
+                                 preset=self.level if self.level is not None else 6)
+
+        return gzip.compress(data, compresslevel=self.level if self.level is not None else 6)
+
+    def _write_block(self) -> None:
+        if not self._block:
+            return
+
+        data = b"".join(self._block)
+        self._block = []
+        self._buffered = 0
+
+        started = time.thread_time()
+        member = self._compress(data)
+        self.cpu_seconds += time.thread_time() - started
+
+        if self._file is None:
+            self._file = open(self.filename, "ab")
+
+        # член пишется и сбрасывается целиком: читатель видит либо весь блок, либо хвост
+        self._file.write(member)
+        self._file.flush()
+
+        self.blocks += 1
+        self.raw_bytes += len(data)
+        self.compressed_bytes += len(member)
+
+    def stats(self) -> dict[str, object]:
+        megabytes = self.raw_bytes / 1e6
+
+        return {
+            "method": self.method.value,
+            "blocks": self.blocks,
+            "raw_bytes": self.raw_bytes,
+            "compressed_bytes": self.compressed_bytes,
+            "ratio": self.raw_bytes / self.compressed_bytes if self.compressed_bytes else None,
+            "cpu_seconds": self.cpu_seconds,
+            "cpu_seconds_per_mb": self.cpu_seconds / megabytes if megabytes else None,
+        }
+
+    def flush(self) -> None:
+        with self._lock:
+            self._write_block()
+
+    def close(self) -> None:
+        with self._lock:
+            self._write_block()
+
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+_TOKEN = re.compile(r"\w+")
+
+
+def _tokens(text: str) -> set[str]:
+    return set(_TOKEN.findall(text.lower()))
+
+
+class _Postings:
+    """Возрастающие номера записей; вытесненные номера отрезаются сдвигом начала"""
+
+    __slots__ = ("seqs", "head")
+
+    def __init__(self) -> None:
+        self.seqs: list[int] = []
+        self.head = 0
+
+    def __len__(self) -> int:
+        return len(self.seqs) - self.head
+
+    def pop_oldest(self) -> None:
+        self.head += 1
+
+        if self.head >= 1024 and self.head * 2 >= len(self.seqs):
+            del self.seqs[:self.head]
+            self.head = 0
+
+    def since(self, seq: int) -> int:
+        return bisect_left(self.seqs, seq, lo=self.head)
+
+    def iter_from(self, seq: int) -> Iterator[int]:
+        seqs = self.seqs
+        return (seqs[i] for i in range(self.since(seq), len(seqs)))
+
+    def __contains__(self, seq: int) -> bool:
+        position = self.since(seq)
+        return position < len(self.seqs) and self.seqs[position] == seq
+
+
+class CaptureHandler(LogHandlerProtocol):
+    """
+    Последние capacity записей в памяти для тестов и диагностики. Записи
+    хранятся кольцом компактных массивов (время, код уровня, сообщение)
+    с индексом по уровням и необязательным обратным индексом слов.
+    query отвечает без полного перебора: время ищется бинарным поиском,
+    а кандидаты берутся из самого короткого подходящего индекса
+    """
+
+    def __init__(self, capacity: int = 100_000, index_tokens: bool = True) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+
+        self.capacity = capacity
+        self.index_tokens = index_tokens
+
+        self._timestamps = array("d", bytes(8 * capacity))
+        self._codes = bytearray(capacity)
+        self._messages: list[Optional[str]] = [None] * capacity
+        self._base = self._next = 0
+        self._levels = [_Postings() for _ in LEVELS_BY_CODE]
+        self._tokens: dict[str, _Postings] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._next - self._base
+
+    def handle(self, log_level: LogLevel, text: str) -> None:
+        timestamp = time.time()
+        code = LEVEL_CODES[log_level]
+
+        with self._lock:
+            if self._next - self._base == self.capacity:
+                self._evict()
+
+            seq = self._next
+            slot = seq % self.capacity
+            self._timestamps[slot] = timestamp
+            self._codes[slot] = code
+            self._messages[slot] = text
+            self._levels[code].seqs.append(seq)
+
+            if self.index_tokens:
+                for token in _tokens(text):
+                    postings = self._tokens.get(token)
+
+                    if postings is None:
+                        postings = self._tokens[token] = _Postings()
+
+                    postings.seqs.append(seq)
+
+            self._next = seq + 1
+
+    def _evict(self) -> None:
+        slot = self._base % self.capacity
+        self._levels[self._codes[slot]].pop_oldest()
+
+        if self.index_tokens:
+            for token in _tokens(self._messages[slot]):
+                postings = self._tokens[token]
+                postings.pop_oldest()
+
+                if not postings:
+                    del self._tokens[token]
+
+        self._messages[slot] = None
+        self._base += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._messages = [None] * self.capacity
+            self._base = self._next
+            self._levels = [_Postings() for _ in LEVELS_BY_CODE]
+            self._tokens = {}
+
+    def query(self, level: Optional[LogLevel | Iterable[LogLevel]] = None,
+              contains: Optional[str] = None,
+              since: Optional[float] = None,
+              until: Optional[float] = None,
+              limit: Optional[int] = None) -> list[LogRecord]:
+        """
+        Записи в порядке поступления. contains ищет слова (\\w+) без учета
+        регистра: запись должна содержать все слова строки
+        """
+        codes: Optional[set[int]] = None
+
+        if level is not None:
+            levels = [level] if isinstance(level, LogLevel) else level
+            codes = {LEVEL_CODES[item] for item in levels}
+
+        words = _tokens(contains) if contains is not None else set()
+
+        with self._lock:
+            timestamps, capacity, base = self._timestamps, self.capacity, self._base
+            seqs = range(base, self._next)
+            key = lambda seq: timestamps[seq % capacity]
+            lo = base + bisect_left(seqs, since, key=key) if since is not None else base
+            hi = base + bisect_right(seqs, until, key=key) if until is not None else self._next
+
+            candidates, checks = self._candidates(codes, words, lo, hi)
+            records: list[LogRecord] = []
+
+            for seq in candidates:
+                if seq >= hi or (limit is not None and len(records) >= limit):
+                    break
+
+                slot = seq % capacity
+                code = self._codes[slot]
+
+                if codes is not None and code not in codes:
+                    continue
+
+                if not all(seq in postings for postings in checks):
+                    continue
+
+                message = self._messages[slot]
+
+                if words and not self.index_tokens and not words <= _tokens(message):
+                    continue
+
+                records.append(LogRecord(timestamps[slot], LEVELS_BY_CODE[code], message))
+
+            return records
+
+    def _candidates(self, codes: Optional[set[int]], words: set[str],
+                    lo: int, hi: int) -> tuple[Iterable[int], list[_Postings]]:
+        """Самый короткий источник кандидатов и индексы слов для проверки остальных"""
+        checks: list[_Postings] = []
+
+        if words and self.index_tokens:
+            postings = [self._tokens.get(word) for word in words]
+
+            if not all(postings):
+                return [], []
+
+            checks = sorted(postings, key=len)
+
+        levels = [self._levels[code] for code in codes] if codes is not None else None
+
+        if checks and (levels is None or len(checks[0]) <= sum(map(len, levels))):
+            return checks[0].iter_from(lo), checks[1:]
+
+        if levels is not None:
+            return merge(*(postings.iter_from(lo) for postings in levels)), checks
+
+        return range(lo, hi), checks
+
+
+# endregion
+
+# region Formatter classes
+
+class StandardFormatter(LogFormatterProtocol):
+    """
+    Метка времени с точностью до секунды строится strftime один раз в секунду
+    и переиспользуется; миллисекунды при необходимости дописываются к ней
+    """
+
+    def __init__(self, milliseconds: bool = False) -> None:
+        self.milliseconds = milliseconds
+        self._cache: tuple[int, str] = (-1, "")
+
+    def _timestamp(self, second: int) -> str:
+        cached_second, stamp = self._cache
+
+        if cached_second != second:
+            stamp = time.strftime("%Y.%m.%d %H:%M:%S", time.localtime(second))
+            self._cache = (second, stamp)
+
+        return stamp
+
+    def format(self, log_level: LogLevel, text: str) -> str:
+        now = time.time()
+        second = int(now)
+        stamp = self._timestamp(second)
+
+        if self.milliseconds:
+            return f"{log_level.value} [{stamp}.{int((now - second) * 1000):03d}] {text}"
+
+        return f"{log_level.value} [{stamp}] {text}"
+
+
+class JsonFormatter(LogFormatterProtocol):
+    """
+    Запись в одну строку JSON (JSON Lines). Поля StructuredMessage
+    вставляются готовым фрагментом, без повторной сериализации
+    """
+
+    def format(self, log_level: LogLevel, text: str) -> str:
+        if isinstance(text, StructuredMessage):
+            message, fields = text.message, text.fields_json
+        else:
+            message, fields = text, ""
+
+        head = (f'{{"time": {time.time():.3f}, "level": "{log_level.value}", '
+                f'"message": {json.dumps(message, ensure_ascii=False)}')
+
+        return f"{head}, {fields}}}" if fields else f"{head}}}"
+
+
+class EpochFormatter(LogFormatterProtocol):
+    """Метка для машинной обработки: целые миллисекунды от эпохи или монотонных часов"""
+
+    def __init__(self, monotonic: bool = False) -> None:
+        self.monotonic = monotonic
+        self._clock = time.monotonic_ns if monotonic else time.time_ns
+
+    def format(self, log_level: LogLevel, text: str) -> str:
+        return f"{log_level.value} [{self._clock() // 1_000_000}] {text}"
+
+
+# endregion
+
+# region Reader classes
+
+def _first_ns_after(seconds: float, inclusive: bool) -> int:
+    """Наименьшее время в нс, которое в секундах (нс / 1e9) >= seconds (или > seconds)"""
+    # seconds * 1e9 ошибается не больше чем на несколько ulp: ищем точную границу рядом
+    margin = int(math.ulp(seconds) * 1e9) + 2
+    candidates = range(math.floor(seconds * 1e9) - margin, math.ceil(seconds * 1e9) + margin)
+
+    if inclusive:
+        return candidates[bisect_left(candidates, True, key=lambda ns: ns / 1e9 >= seconds)]
+
+    return candidates[bisect_left(candidates, True, key=lambda ns: ns / 1e9 > seconds)]
+
+
+class BinaryLogReader:
+    """
+    Чтение лога BinaryFileHandler через mmap. Запросы по времени и уровням
+    пропускают блоки по индексу и разбирают только подходящие блоки,
+    а также хвост файла, еще не попавший в индекс
+    """
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        self._file = open(filename, "rb")
+        self._size = os.fstat(self._file.fileno()).st_size
+        self._map: Optional[mmap.mmap] = None
+
+        if self._size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._size < len(BINARY_LOG_MAGIC) or self._map[:len(BINARY_LOG_MAGIC)] != BINARY_LOG_MAGIC:
+            self.close()
+            raise ValueError(f"{filename} is not a binary log")
+
+        self.blocks: list[tuple[int, int, int, int, int, int]] = []
+        index_filename = f"{filename}.idx"
+
+        if os.path.exists(index_filename):
+            with open(index_filename, "rb") as index:
+                data = index.read()
+
+            usable = len(data) - len(data) % BINARY_INDEX_ENTRY.size
+            self.blocks = [
+                entry for entry in BINARY_INDEX_ENTRY.iter_unpack(data[:usable])
+                if entry[1] <= self._size
+            ]
+
+    def __iter__(self) -> Iterator[LogRecord]:
+        return self.query()
+
+    def query(self, levels: Optional[Iterable[LogLevel]] = None,
+              since: Optional[float] = None,
+              until: Optional[float] = None) -> Iterator[LogRecord]:
+        mask = 0
+
+        for level in levels if levels is not None else LogLevel:
+            mask |= 1 << LEVEL_CODES[level]
+
+        # границы переводятся в нс так же точно, как время записи в секунды:
+        # query(since=record.timestamp) всегда включает саму запись
+        since_ns = _first_ns_after(since, inclusive=True) if since is not None else None
+        until_ns = _first_ns_after(until, inclusive=False) - 1 if until is not None else None
+        tail = len(BINARY_LOG_MAGIC)
+
+        for start, end, first, last, count, block_mask in self.blocks:
+            tail = max(tail, end)
+
+            if not block_mask & mask:
+                continue
+
+            if since_ns is not None and last < since_ns:
+                continue
+
+            if until_ns is not None and first > until_ns:
+                continue
+
+            yield from self._scan(start, end, mask, since_ns, until_ns)
+
+        yield from self._scan(tail, self._size, mask, since_ns, until_ns)
+
+    def _scan(self, offset: int, end: int, mask: int,
+              since_ns: Optional[int], until_ns: Optional[int]) -> Iterator[LogRecord]:
+        data = self._map
+
+        while offset + BINARY_RECORD.size <= end:
+            length, timestamp, code = BINARY_RECORD.unpack_from(data, offset)
+            offset += BINARY_RECORD.size
+
+            if offset + length > end:
+                return  # запись дописана не полностью
+
+            if (mask >> code & 1
+                    and (since_ns is None or timestamp >= since_ns)
+                    and (until_ns is None or timestamp <= until_ns)):
+                yield LogRecord(timestamp / 1e9, LEVELS_BY_CODE[code],
+                                data[offset:offset + length].decode("utf-8"))
+
+            offset += length
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+        self._file.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+class RingBufferReader:
+    """
+    Восстановление записей кольцевого лога RingBufferHandler в порядке записи,
+    в том числе после аварийного завершения пишущего процесса
+    """
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+
+        with open(filename, "rb") as file:
+            data = file.read()
+
+        if len(data) < RING_DATA_OFFSET or data[:len(RING_LOG_MAGIC)] != RING_LOG_MAGIC:
+            raise ValueError(f"{filename} is not a ring log")
+
+        self.capacity, self.head, self.cursor = RING_HEADER.unpack_from(data, len(RING_LOG_MAGIC))
+
+        if (len(data) != RING_DATA_OFFSET + self.capacity
+                or not self.head <= self.cursor <= self.head + self.capacity):
+            raise ValueError(f"{filename} has a corrupted ring header")
+
+        self._data = data
+
+    def __iter__(self) -> Iterator[LogRecord]:
+        for _, timestamp, code, payload in _ring_records(
+            self._data, self.capacity, self.head, self.cursor
+        ):
+            yield LogRecord(timestamp / 1e9, LEVELS_BY_CODE[code], payload.decode("utf-8", "replace"))
+
+
+class CompressedLogReader:
+    """
+    Построчное чтение лога CompressedFileHandler по завершенным блокам.
+    Недописанный последний блок пропускается, поэтому читать можно
+    во время записи
+    """
+
+    def __init__(self, filename: str, chunk_size: int = 1024 * 1024) -> None:
+        self.filename = filename
+        self.chunk_size = chunk_size
+
+        with open(filename, "rb") as file:
+            magic = file.read(6)
+
+        for method, prefix in COMPRESSION_MAGIC.items():
+            if magic.startswith(prefix):
+                self.method = method
+                break
+        else:
+            raise ValueError(f"{filename} is not a compressed log")
+
+    def _decompressor(self) -> "zlib._Decompress | lzma.LZMADecompressor":
+        if self.method is CompressionMethod.LZMA:
+            return lzma.LZMADecompressor(format=lzma.FORMAT_XZ)
+
+        return zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+
+    def blocks(self) -> Iterator[bytes]:
+        decompressor = self._decompressor()
+        parts: list[bytes] = []
+
+        with open(self.filename, "rb") as file:
+            while chunk := file.read(self.chunk_size):
+                while chunk:
+                    parts.append(decompressor.decompress(chunk))
+
+                    if not decompressor.eof:
+                        break
+
+                    yield b"".join(parts)
+                    parts = []
+                    chunk = decompressor.unused_data
+                    decompressor = self._decompressor()
+
+    def __iter__(self) -> Iterator[str]:
+        for block in self.blocks():
+            # записи разделяются только "\n": \r и прочие разделители splitlines - часть текста
+            lines = block.decode("utf-8").split("\n")
+
+            if not lines[-1]:
+                lines.pop()
+
+            yield from lines
+
+
+class LogFollower:
+    """
+    Чтение новых строк растущего текстового лога (как tail -F). Хранит
+    смещение и inode открытого файла: после ротации дочитывает старый файл
+    и переходит на новый, после усечения читает файл сначала. Уровень строки
+    берется из первого слова (формат StandardFormatter), строки проверяются
+    теми же фильтрами, что и в Logger
+    """
+
+    def __init__(self, filename: str,
+                 filters: Optional[list[LogFilterProtocol]] = None,
+                 offset: Optional[int] = None,
+                 default_level: LogLevel = LogLevel.INFO,
+                 poll_interval: float = 0.25,
+                 chunk_size: int = 64 * 1024) -> None:
+        self.filename = filename
+        self.filters = filters.copy() if filters else []
+        self.default_level = default_level
+        self.poll_interval = poll_interval
+        self.chunk_size = chunk_size
+        self.inode: Optional[tuple[int, int]] = None
+
+        # None — начать с конца файла (или с начала, если файла еще нет),
+        # иначе продолжить с сохраненного смещения
+        self._position = offset if offset is not None or os.path.exists(filename) else 0
+        self._partial = b""
+        self._file: Optional[BinaryIO] = None
+
+    @property
+    def offset(self) -> int:
+        """Смещение после последней полной строки: с него можно продолжить чтение"""
+        return (self._position or 0) - len(self._partial)
+
+    def _open(self) -> bool:
+        try:
+            self._file = open(self.filename, "rb")
+        except FileNotFoundError:
+            return False
+
+        stat = os.fstat(self._file.fileno())
+        self.inode = (stat.st_dev, stat.st_ino)
+
+        if self._position is None:
+            self._position = stat.st_size
+        elif self._position > stat.st_size:
+            self._position = 0
+
+        self._file.seek(self._position)
+        return True
+
+    def read_new(self) -> list[tuple[LogLevel, str]]:
+        """Один проход без ожидания: новые полные строки, прошедшие фильтры"""
+        if self._file is None and not self._open():
+            return []
+
+        records = self._drain()
+
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            return records  # старый файл переименован, новый еще не создан
+
+        if (stat.st_dev, stat.st_ino) != self.inode:
+            if self._partial:
+                self._accept(self._partial, records)
+
+            self._file.close()
+            self._file = None
+            self._position = 0
+            self._partial = b""
+
+            if self._open():
+                records += self._drain()
+
+        elif stat.st_size < self._position:
+            self._file.seek(0)
+            self._position = 0
+            self._partial = b""
+            records += self._drain()
+
+        return records
+
+    def _drain(self) -> list[tuple[LogLevel, str]]:
+        records: list[tuple[LogLevel, str]] = []
+
+        while chunk := self._file.read(self.chunk_size):
+            self._position += len(chunk)
+            *lines, self._partial = (self._partial + chunk).split(b"\n")
+
+            for line in lines:
+                self._accept(line, records)
+
+        return records
+
+    def _accept(self, line: bytes, records: list[tuple[LogLevel, str]]) -> None:
+        text = line.decode("utf-8", "replace")
+        log_level = LEVELS_BY_NAME.get(text.partition(" ")[0], self.default_level)
+
+        for _filter in self.filters:
+            if not _filter.match(log_level, text):
+                return
+
+        records.append((log_level, text))
+
+    def follow(self, idle_timeout: Optional[float] = None) -> Iterator[tuple[LogLevel, str]]:
+        """Бесконечно выдает новые строки; останавливается после idle_timeout секунд без них"""
+        idle_since = time.monotonic()
+
+        while True:
+            records = self.read_new()
+
+            if records:
+                yield from records
+                idle_since = time.monotonic()
+                continue
+
+            if idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+                return
+
+            time.sleep(self.poll_interval)
+
+    def __iter__(self) -> Iterator[tuple[LogLevel, str]]:
+        return self.follow()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+# endregion
+
+# region Collector classes
+
+def _run_collector(records: "multiprocessing.Queue[Optional[tuple[int, str]]]",
+                   handler_factory: Callable[[], list[LogHandlerProtocol]],
+                   batch_size: int) -> None:
+    handlers = handler_factory()
+    stopping = False
+
+    while not stopping:
+        batch = [records.get()]
+        stopping = batch[0] is None
+
+        # после маркера остановки очередь вычитывается до конца
+        while len(batch) < batch_size or stopping:
+            try:
+                record = records.get_nowait()
+            except queue.Empty:
+                break
+
+            batch.append(record)
+            stopping = stopping or record is None
+
+        for record in batch:
+            if record is None:
+                continue
+
+            code, text = record
+
+            for handler in handlers:
+                try:
+                    handler.handle(LEVELS_BY_CODE[code], text)
+                except Exception as ex:
+                    print(f"[!] LogCollector error: {ex}")
+
+        for handler in handlers:
+            flush = getattr(handler, "flush", None)
+
+            if flush is not None:
+                flush()
+
+    for handler in handlers:
+        close = getattr(handler, "close", None)
+
+        if close is not None:
+            close()
+
+
+class LogCollector:
+    """
+    Процесс-сборщик: владеет настоящими обработчиками (их создает
+    handler_factory уже внутри процесса) и пишет записи рабочих процессов
+    пачками. Рабочие логгеры получают CollectorHandler через handler()
+    """
+
+    def __init__(self, handler_factory: Callable[[], list[LogHandlerProtocol]],
+                 capacity: int = 10_000,
+                 batch_size: int = 256,
+                 context: Optional[str] = None) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+
+        ctx = multiprocessing.get_context(context)
+        self.records: "multiprocessing.Queue[Optional[tuple[int, str]]]" = ctx.Queue(capacity)
+        self._process = ctx.Process(target=_run_collector, name="LogCollector", daemon=True,
+                                    args=(self.records, handler_factory, batch_size))
+
+    def start(self) -> None:
+        self._process.start()
+
+    def handler(self, timeout: Optional[float] = None) -> CollectorHandler:
+        return CollectorHandler(self.records, timeout)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        # останавливать после завершения рабочих: записи после маркера теряются
+        if self._process.is_alive():
+            self.records.put(None)
+            self._process.join(timeout)
+
+    def __enter__(self) -> Self:
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.stop()
+
+
+# endregion
+
+# region Instrumentation classes
+
+LATENCY_BUCKETS: tuple[float, ...] = (
+    1e-6, 2e-6, 5e-6, 1e-5, 2e-5, 5e-5, 1e-4, 2e-4, 5e-4,
+    1e-3, 2e-3, 5e-3, 1e-2, 2e-2, 5e-2, 1e-1, 2e-1, 5e-1, 1.0,
+)
+
+
+class ComponentStats:
+    """Счетчики одного фильтра/форматтера/обработчика"""
+
+    def __init__(self, name: str, component: object) -> None:
+        self.name = name
+        self.component = component
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def record(self, seconds: float, failed: bool = False) -> None:
+        self.calls += 1
+        self.total_seconds += seconds
+        self.histogram[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+        if failed:
+            self.errors += 1
+
+    def snapshot(self) -> dict[str, object]:
+        labels = [f"<={bound:g}s" for bound in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]:g}s"]
+        result: dict[str, object] = {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_seconds": self.total_seconds,
+            "mean_seconds": self.total_seconds / self.calls if self.calls else 0.0,
+            "histogram": {label: n for label, n in zip(labels, self.histogram) if n},
+        }
+
+        # ошибки, которые компонент перехватывает сам (SocketHandler, FtpHandler, ...)
+        for counter in ("errors", "dropped"):
+            value = getattr(self.component, counter, None)
+
+            if isinstance(value, int):
+                result[f"internal_{counter}"] = value
+
+        return result
+
+
+# endregion
+
+@dataclass
+class HandlerRoute:
+    """
+    Обработчик со своими условиями: минимальный уровень, фильтры и цепочка
+    форматтеров (None — форматтеры логгера). Ставится в handlers логгера
+    вместо самого обработчика
+    """
+
+    handler: LogHandlerProtocol
+    level: Optional[LogLevel] = None
+    filters: list[LogFilterProtocol] = field(default_factory=list)
+    formatters: Optional[list[LogFormatterProtocol]] = None
+
+
+class Logger:
+    """
+    Фильтры уровня (LevelFilter) сводятся в один минимальный уровень, который
+    проверяется до любой работы с сообщением. Аргументы сообщения (*args)
+    подставляются в стиле % или {} только для записей, прошедших этот порог.
+    Обработчики, заданные через HandlerRoute, получают только свои записи;
+    запись форматируется лениво и один раз на каждую нужную цепочку форматтеров
+    """
+
+    def __init__(self, filters: Optional[list[LogFilterProtocol]] = None,
+                 handlers: Optional[list[LogHandlerProtocol]] = None,
+                 formatters: Optional[list[LogFormatterProtocol]] = None,
+                 raise_on_reject: bool = True,
+                 style: str = "%",
+                 instrument: bool = False,
+                 stats_interval: Optional[float] = None) -> None:
+        if style not in ("%", "{"):
+            raise ValueError(f"Unknown message style: {style}")
+
+        self._min_rank = self._route_rank = min(LEVELS_ORDER.values())
+        self.filters = filters.copy() if filters else []
+        self.handlers = handlers.copy() if handlers else []
+        self.formatters = formatters.copy() if formatters else []
+        self.raise_on_reject = raise_on_reject
+        self.style = style
+        self.instrument = instrument or stats_interval is not None
+        self.stats_interval = stats_interval
+
+        self._stats: dict[tuple[str, int], ComponentStats] = {}
+        self._records = 0
+        self._next_stats = time.monotonic() + stats_interval if stats_interval else None
+
+        if self.instrument:
+            # без инструментирования горячий путь не содержит ни одной лишней проверки
+            self._accept = self._accept_instrumented
+            self._emit = self._emit_instrumented
+
+    @property
+    def filters(self) -> list[LogFilterProtocol]:
+        return self._filters
+
+    @filters.setter
+    def filters(self, filters: list[LogFilterProtocol]) -> None:
+        # изменения списка на месте (append и т.п.) тоже пересчитывают порог
+        self._filters = _ObservedList(filters, self._update_filters)
+        self._update_filters()
+
+    def _update_filters(self) -> None:
+        filters = self._filters
+        self._text_filters = [f for f in filters if not isinstance(f, LevelFilter)]
+        self._gate: Optional[LevelFilter] = max(
+            (f for f in filters if isinstance(f, LevelFilter)),
+            key=lambda f: f.threshold, default=None,
+        )
+        self._min_rank = self._gate.threshold if self._gate else min(LEVELS_ORDER.values())
+        self._update_floor()
+
+        for _filter in filters:
+            # сводки повторов идут в обработчики в обход фильтров
+            if isinstance(_filter, DedupFilter) and _filter.emit is None:
+                _filter.emit = self._emit_summary
+
+    @property
+    def handlers(self) -> list[LogHandlerProtocol | HandlerRoute]:
+        return self._handlers
+
+    @handlers.setter
+    def handlers(self, handlers: list[LogHandlerProtocol | HandlerRoute]) -> None:
+        # изменения списка на месте (append и т.п.) тоже пересчитывают маршруты
+        self._handlers = _ObservedList(handlers, self._update_handlers)
+        self._update_handlers()
+
+    def _update_handlers(self) -> None:
+        handlers = self._handlers
+        self._targets = [h.handler if isinstance(h, HandlerRoute) else h for h in handlers]
+        self._routes: Optional[list[tuple[int, list[LogFilterProtocol],
+                                          Optional[list[LogFormatterProtocol]],
+                                          LogHandlerProtocol]]] = None
+        lowest = min(LEVELS_ORDER.values())
+        self._route_rank = lowest
+
+        if any(isinstance(h, HandlerRoute) for h in handlers):
+            routes = [h if isinstance(h, HandlerRoute) else HandlerRoute(h) for h in handlers]
+            self._routes = [
+                (LEVELS_ORDER[route.level] if route.level is not None else lowest,
+                 route.filters, route.formatters, route.handler)
+                for route in routes
+            ]
+            self._route_rank = min((rank for rank, *_ in self._routes), default=lowest)
+
+        self._update_floor()
+
+    def _close_filters(self) -> None:
+        # накопленные сводки повторов уходят до закрытия очередей
+        for _filter in self._filters:
+            if isinstance(_filter, DedupFilter) and _filter.emit == self._emit_summary:
+                _filter.close()
+
+    def _emit_summary(self, log_level: LogLevel, text: str) -> None:
+        """Отправка сводки повторов; может вызываться из потока таймера фильтра"""
+        self._dispatch(log_level, text)
+
+    def _update_floor(self) -> None:
+        # ниже этого уровня запись не нужна ни фильтрам логгера, ни одному маршруту
+        self._floor = max(self._min_rank, self._route_rank)
+
+    def is_enabled_for(self, log_level: LogLevel) -> bool:
+        return LEVELS_ORDER[log_level] >= self._floor
+
+    def log(self, log_level: LogLevel, text: str, *args: object) -> None:
+        if LEVELS_ORDER[log_level] < self._floor:
+            if LEVELS_ORDER[log_level] < self._min_rank:
+                self._reject(self._gate)
+
+            return
+
+        text = self._render(text, args)
+
+        if self._accept(log_level, text):
+            self._dispatch(log_level, text)
+
+    def _render(self, text: str, args: tuple[object, ...]) -> str:
+        if not args:
+            return str(text)
+
+        if self.style == "{":
+            return str(text).format(*args)
+
+        return str(text) % args
+
+    def _accept(self, log_level: LogLevel, text: str) -> bool:
+        for _filter in self._text_filters:
+            if not _filter.match(log_level, text):
+                self._reject(_filter)
+                return False
+
+        return True
+
+    def _reject(self, _filter: object) -> None:
+        if self.raise_on_reject:
+            raise Exception(f"[!] Filter {_filter.__class__.__name__} failed")
+
+    def _dispatch(self, log_level: LogLevel, text: str) -> None:
+        self._emit(log_level, text)
+
+    def _emit(self, log_level: LogLevel, text: str) -> None:
+        if self._routes is not None:
+            self._emit_routed(log_level, text)
+            return
+
+        formatted_text = text
+
+        for _formatter in self.formatters:
+            formatted_text = _formatter.format(log_level, formatted_text)
+
+        data: Optional[bytes] = None
+
+        for _handler in self.handlers:
+            if isinstance(_handler, LogBytesHandlerProtocol):
+                # запись кодируется один раз и общим объектом уходит всем байтовым обработчикам
+                if data is None:
+                    data = f"{formatted_text}\n".encode("utf-8")
+
+                _handler.handle_bytes(log_level, data)
+            else:
+                _handler.handle(log_level, formatted_text)
+
+    def _route_targets(self, log_level: LogLevel, text: str,
+                       timed: bool = False) -> list[tuple[LogHandlerProtocol, str, int]]:
+        """Обработчики, принявшие запись, с текстом их цепочки форматтеров и ее ключом"""
+        rank = LEVELS_ORDER[log_level]
+        formatted: dict[int, str] = {}
+        targets: list[tuple[LogHandlerProtocol, str, int]] = []
+
+        for route_rank, filters, formatters, handler in self._routes:
+            if rank < route_rank:
+                continue
+
+            if not all(_filter.match(log_level, text) for _filter in filters):
+                continue
+
+            chain = self.formatters if formatters is None else formatters
+            key = id(chain)
+            formatted_text = formatted.get(key)
+
+            if formatted_text is None:
+                formatted_text = text
+
+                for _formatter in chain:
+                    if timed:
+                        stats = self._component_stats("formatters", _formatter)
+                        formatted_text = self._timed(stats, _formatter.format,
+                                                     log_level, formatted_text)
+                    else:
+                        formatted_text = _formatter.format(log_level, formatted_text)
+
+                formatted[key] = formatted_text
+
+            targets.append((handler, formatted_text, key))
+
+        return targets
+
+    def _emit_routed(self, log_level: LogLevel, text: str, timed: bool = False) -> None:
+        encoded: dict[int, bytes] = {}
+
+        for handler, formatted_text, key in self._route_targets(log_level, text, timed):
+            if isinstance(handler, LogBytesHandlerProtocol):
+                data = encoded.get(key)
+
+                if data is None:
+                    data = encoded[key] = f"{formatted_text}\n".encode("utf-8")
+
+                method, payload = handler.handle_bytes, data
+            else:
+                method, payload = handler.handle, formatted_text
+
+            if timed:
+                self._timed(self._component_stats("handlers", handler), method, log_level, payload)
+            else:
+                method(log_level, payload)
+
+    def _component_stats(self, kind: str, component: object) -> ComponentStats:
+        stats = self._stats.get((kind, id(component)))
+
+        if stats is None:
+            stats = ComponentStats(f"{component.__class__.__name__}@{id(component):x}", component)
+            self._stats[(kind, id(component))] = stats
+
+        return stats
+
+    def _timed(self, stats: ComponentStats, call: Callable[..., T], *args: object) -> T:
+        started = time.perf_counter()
+
+        try:
+            result = call(*args)
+        except Exception:
+            stats.record(time.perf_counter() - started, failed=True)
+            raise
+
+        stats.record(time.perf_counter() - started)
+        return result
+
+    def _accept_instrumented(self, log_level: LogLevel, text: str) -> bool:
+        for _filter in self._text_filters:
+            stats = self._component_stats("filters", _filter)
+
+            if not self._timed(stats, _filter.match, log_level, text):
+                self._reject(_filter)
+                return False
+
+        return True
+
+    def _emit_instrumented(self, log_level: LogLevel, text: str) -> None:
+        if self._routes is not None:
+            self._emit_routed(log_level, text, timed=True)
+            self._after_instrumented()
+            return
+
+        formatted_text = text
+
+        for _formatter in self.formatters:
+            stats = self._component_stats("formatters", _formatter)
+            formatted_text = self._timed(stats, _formatter.format, log_level, formatted_text)
+
+        data: Optional[bytes] = None
+
+        for _handler in self.handlers:
+            stats = self._component_stats("handlers", _handler)
+
+            if isinstance(_handler, LogBytesHandlerProtocol):
+                if data is None:
+                    data = f"{formatted_text}\n".encode("utf-8")
+
+                self._timed(stats, _handler.handle_bytes, log_level, data)
+            else:
+                self._timed(stats, _handler.handle, log_level, formatted_text)
+
+        self._after_instrumented()
+
+    def _after_instrumented(self) -> None:
+        self._records += 1
+
+        if self._next_stats is not None and time.monotonic() >= self._next_stats:
+            self._next_stats = time.monotonic() + self.stats_interval
+            Logger._emit(self, LogLevel.INFO, f"logger stats {json.dumps(self.stats())}")
+
+    def stats(self) -> dict[str, object]:
+        snapshot: dict[str, object] = {"records": self._records}
+
+        for kind, components in (("filters", self._text_filters),
+                                 ("formatters", self.formatters),
+                                 ("handlers", self._targets)):
+            snapshot[kind] = {
+                stats.name: stats.snapshot()
+                for stats in (self._component_stats(kind, c) for c in components)
+            }
+
+        return snapshot
+
+    def bind(self, **fields: object) -> "BoundLogger":
+        return BoundLogger(self, fields)
+
+    def log_info(self, text: str, *args: object) -> None:
+        self.log(LogLevel.INFO, text, *args)
+
+    def log_debug(self, text: str, *args: object) -> None:
+        self.log(LogLevel.DEBUG, text, *args)
+
+    def log_warning(self, text: str, *args: object) -> None:
+        self.log(LogLevel.WARNING, text, *args)
+
+    def log_error(self, text: str, *args: object) -> None:
+        self.log(LogLevel.ERROR, text, *args)
+
+    def log_critical(self, text: str, *args: object) -> None:
+        self.log(LogLevel.CRITICAL, text, *args)
+
+
+class BoundLogger:
+    """
+    Логгер с постоянными полями: поля сериализуются один раз при bind,
+    а поля отдельного вызова дописываются к готовым фрагментам.
+    Запись проходит конвейер родительского логгера
+    """
+
+    def __init__(self, logger: Logger, fields: dict[str, object],
+                 parent: Optional["BoundLogger"] = None) -> None:
+        self.logger = logger
+        self.fields = {**parent.fields, **fields} if parent is not None else dict(fields)
+
+        if parent is None or parent.fields.keys() & fields.keys():
+            # переопределенные поля требуют полной сериализации, иначе ключ повторится
+            self._json, self._logfmt = serialize_fields(self.fields)
+        else:
+            self._json, self._logfmt = self._join((parent._json, parent._logfmt),
+                                                  serialize_fields(fields))
+
+    @staticmethod
+    def _join(left: tuple[str, str], right: tuple[str, str]) -> tuple[str, str]:
+        return (
+            ", ".join(part for part in (left[0], right[0]) if part),
+            " ".join(part for part in (left[1], right[1]) if part),
+        )
+
+    def bind(self, **fields: object) -> "BoundLogger":
+        return BoundLogger(self.logger, fields, self)
+
+    def is_enabled_for(self, log_level: LogLevel) -> bool:
+        return self.logger.is_enabled_for(log_level)
+
+    def log(self, log_level: LogLevel, text: str, *args: object, **fields: object) -> None:
+        logger = self.logger
+
+        if LEVELS_ORDER[log_level] < logger._floor:
+            if LEVELS_ORDER[log_level] < logger._min_rank:
+                logger._reject(logger._gate)
+
+            return
+
+        fields_json, fields_logfmt = self._json, self._logfmt
+
+        if fields:
+            fields_json, fields_logfmt = self._join((fields_json, fields_logfmt),
+                                                    serialize_fields(fields))
+
+        message = StructuredMessage(logger._render(text, args), fields_json, fields_logfmt)
+
+        if logger._accept(log_level, message):
+            logger._dispatch(log_level, message)
+
+    def log_info(self, text: str, *args: object, **fields: object) -> None:
+        self.log(LogLevel.INFO, text, *args, **fields)
+
+    def log_debug(self, text: str, *args: object, **fields: object) -> None:
+        self.log(LogLevel.DEBUG, text, *args, **fields)
+
+    def log_warning(self, text: str, *args: object, **fields: object) -> None:
+        self.log(LogLevel.WARNING, text, *args, **fields)
+
+    def log_error(self, text: str, *args: object, **fields: object) -> None:
+        self.log(LogLevel.ERROR, text, *args, **fields)
+
+    def log_critical(self, text: str, *args: object, **fields: object) -> None:
+        self.log(LogLevel.CRITICAL, text, *args, **fields)
+
+
+class QueueLogger(Logger):
+    """
+    Логгер с фоновой отправкой: вызывающий поток проверяет фильтры и кладет
+    запись в очередь, форматирование и обработчики выполняет рабочий поток
+    """
+
+    def __init__(self, filters: Optional[list[LogFilterProtocol]] = None,
+                 handlers: Optional[list[LogHandlerProtocol]] = None,
+                 formatters: Optional[list[LogFormatterProtocol]] = None,
+                 capacity: int = 10_000,
+                 policy: OverflowPolicy = OverflowPolicy.BLOCK,
+                 batch_size: int = 256,
+                 raise_on_reject: bool = True,
+                 style: str = "%",
+                 instrument: bool = False,
+                 stats_interval: Optional[float] = None) -> None:
+        super().__init__(filters, handlers, formatters, raise_on_reject, style,
+                         instrument, stats_interval)
+
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+
+        self.batch_size = batch_size
+        self.errors = 0
+        self.queue: RecordQueue[tuple[LogLevel, str]] = RecordQueue(capacity, policy)
+
+        self._worker = threading.Thread(target=self._run, name="QueueLogger", daemon=True)
+        self._worker.start()
+        atexit.register(self.shutdown)
+
+    @property
+    def dropped(self) -> int:
+        return self.queue.dropped
+
+    def _dispatch(self, log_level: LogLevel, text: str) -> None:
+        try:
+            self.queue.put((log_level, text))
+        except RuntimeError:
+            raise RuntimeError("QueueLogger is shut down") from None
+
+    def _run(self) -> None:
+        while True:
+            batch = self.queue.get_batch(self.batch_size)
+
+            if not batch and self.queue.closed:
+                return
+
+            for log_level, text in batch:
+                try:
+                    self._emit(log_level, text)
+                except Exception as ex:
+                    self.errors += 1
+                    print(f"[!] QueueLogger error: {ex}")
+
+            self.queue.task_done(len(batch))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        return self.queue.join(timeout)
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        atexit.unregister(self.shutdown)
+        self._close_filters()
+        self.queue.close()
+        self._worker.join(timeout)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.shutdown()
+
+
+class FanOutLogger(Logger):
+    """
+    Логгер, отдающий каждую запись всем обработчикам параллельно: каждый
+    обработчик работает в своем HandlerWorker. Обработчики, переданные
+    уже обернутыми в HandlerWorker, сохраняют свои емкость и политику
+    """
+
+    def __init__(self, filters: Optional[list[LogFilterProtocol]] = None,
+                 handlers: Optional[list[LogHandlerProtocol]] = None,
+                 formatters: Optional[list[LogFormatterProtocol]] = None,
+                 capacity: int = 10_000,
+                 policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+                 raise_on_reject: bool = True,
+                 style: str = "%",
+                 instrument: bool = False,
+                 stats_interval: Optional[float] = None) -> None:
+        self.capacity = capacity
+        self.policy = policy
+        super().__init__(filters, handlers, formatters, raise_on_reject, style,
+                         instrument, stats_interval)
+        atexit.register(self.shutdown)
+
+    def _wrap(self, handler: LogHandlerProtocol) -> HandlerWorker:
+        if isinstance(handler, HandlerWorker):
+            return handler
+
+        if isinstance(handler, LogBytesHandlerProtocol):
+            return BytesHandlerWorker(handler, self.capacity, self.policy)
+
+        return HandlerWorker(handler, self.capacity, self.policy)
+
+    def _update_handlers(self) -> None:
+        # обработчики, добавленные и после создания логгера, тоже получают свой поток
+        for i, handler in enumerate(self._handlers):
+            if isinstance(handler, HandlerRoute):
+                if not isinstance(handler.handler, HandlerWorker):
+                    list.__setitem__(self._handlers, i,
+                                     replace(handler, handler=self._wrap(handler.handler)))
+            elif not isinstance(handler, HandlerWorker):
+                list.__setitem__(self._handlers, i, self._wrap(handler))
+
+        super()._update_handlers()
+
+    def health(self) -> dict[str, dict[str, object]]:
+        return {worker.name: worker.status() for worker in self._targets}
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        flushed = True
+
+        for worker in self._targets:
+            remaining = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+            flushed = worker.flush(remaining) and flushed
+
+        return flushed
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        atexit.unregister(self.shutdown)
+        self._close_filters()
+
+        for worker in self._targets:
+            worker.queue.close()
+
+        for worker in self._targets:
+            worker.close(timeout)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.shutdown()
+
+
+class AsyncLogger(Logger):
+    """
+    Логгер для asyncio: await alog(...) проходит те же фильтры и форматтеры,
+    затем ждет асинхронные обработчики (AsyncLogHandlerProtocol), а обычные
+    блокирующие обработчики выполняет в отдельном потоке. Один поток
+    сохраняет порядок записей в каждом блокирующем обработчике
+    """
+
+    def __init__(self, filters: Optional[list[LogFilterProtocol]] = None,
+                 handlers: Optional[list[LogHandlerProtocol | AsyncLogHandlerProtocol]] = None,
+                 formatters: Optional[list[LogFormatterProtocol]] = None,
+                 raise_on_reject: bool = True,
+                 style: str = "%",
+                 instrument: bool = False) -> None:
+        super().__init__(filters, handlers, formatters, raise_on_reject, style, instrument)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="AsyncLogger")
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def alog(self, log_level: LogLevel, text: str, *args: object) -> None:
+        if LEVELS_ORDER[log_level] < self._floor:
+            if LEVELS_ORDER[log_level] < self._min_rank:
+                self._reject(self._gate)
+
+            return
+
+        self._loop = asyncio.get_running_loop()
+        text = self._render(text, args)
+
+        if self._accept(log_level, text):
+            await self._aemit(log_level, text)
+
+    def _dispatch(self, log_level: LogLevel, text: str) -> None:
+        # синхронный log() из корутины: отправка выполняется отдельной задачей
+        try:
+            loop = self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            raise RuntimeError("AsyncLogger.log requires a running event loop") from None
+
+        task = loop.create_task(self._aemit(log_level, text))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _aemit(self, log_level: LogLevel, text: str) -> None:
+        if self._routes is not None:
+            await asyncio.gather(*(
+                self._ahandle(handler, log_level, formatted_text)
+                for handler, formatted_text, _ in self._route_targets(log_level, text,
+                                                                      self.instrument)
+            ))
+
+            if self.instrument:
+                self._records += 1
+
+            return
+
+        formatted_text = text
+
+        for _formatter in self.formatters:
+            if self.instrument:
+                stats = self._component_stats("formatters", _formatter)
+                formatted_text = self._timed(stats, _formatter.format, log_level, formatted_text)
+            else:
+                formatted_text = _formatter.format(log_level, formatted_text)
+
+        if len(self.handlers) == 1:
+            await self._ahandle(self.handlers[0], log_level, formatted_text)
+        else:
+            await asyncio.gather(
+                *(self._ahandle(_handler, log_level, formatted_text) for _handler in self.handlers)
+            )
+
+        if self.instrument:
+            self._records += 1
+
+    async def _ahandle(self, handler: LogHandlerProtocol | AsyncLogHandlerProtocol,
+                       log_level: LogLevel, text: str) -> None:
+        if isinstance(handler, AsyncLogHandlerProtocol):
+            call = handler.handle(log_level, text)
+        else:
+            call = asyncio.get_running_loop().run_in_executor(
+                self._executor, handler.handle, log_level, text
+            )
+
+        if not self.instrument:
+            await call
+            return
+
+        stats = self._component_stats("handlers", handler)
+        started = time.perf_counter()
+
+        try:
+            await call
+        except Exception:
+            stats.record(time.perf_counter() - started, failed=True)
+            raise
+
+        stats.record(time.perf_counter() - started)
+
+    async def flush(self) -> None:
+        """Ждет записи, отправленные синхронным log(), и сбрасывает обработчики"""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        for _handler in self._targets:
+            await self._acall(_handler, "flush")
+
+    def _emit_summary(self, log_level: LogLevel, text: str) -> None:
+        # таймер фильтра работает в своем потоке: сводка передается в цикл логгера
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            loop = self._loop
+
+            if loop is None or loop.is_closed():
+                raise RuntimeError("AsyncLogger has no event loop for the summary") from None
+
+            loop.call_soon_threadsafe(self._dispatch, log_level, text)
+            return
+
+        self._dispatch(log_level, text)
+
+    async def aclose(self) -> None:
+        self._close_filters()
+        await self.flush()
+
+        for _handler in self._targets:
+            await self._acall(_handler, "close")
+
+        self._executor.shutdown(wait=True)
+
+    async def _acall(self, handler: object, name: str) -> None:
+        method = getattr(handler, name, None)
+
+        if method is None:
+            return
+
+        if isinstance(handler, AsyncLogHandlerProtocol):
+            await method()
+        else:
+            await asyncio.get_running_loop().run_in_executor(self._executor, method)
+
+    async def alog_info(self, text: str, *args: object) -> None:
+        await self.alog(LogLevel.INFO, text, *args)
+
+    async def alog_debug(self, text: str, *args: object) -> None:
+        await self.alog(LogLevel.DEBUG, text, *args)
 
-    def log_info(self, text: str) -> None:
-        self.log(LogLevel.INFO, text)
+    async def alog_warning(self, text: str, *args: object) -> None:
+        await self.alog(LogLevel.WARNING, text, *args)
 
-    def log_debug(self, text: str) -> None:
-        self.log(LogLevel.DEBUG, text)
+    async def alog_error(self, text: str, *args: object) -> None:
+        await self.alog(LogLevel.ERROR, text, *args)
 
-    def log_warning(self, text: str) -> None:
-        self.log(LogLevel.WARNING, text)
+    async def alog_critical(self, text: str, *args: object) -> None:
+        await self.alog(LogLevel.CRITICAL, text, *args)
 
-    def log_error(self, text: str) -> None:
-        self.log(LogLevel.ERROR, text)
+    async def __aenter__(self) -> Self:
+        return self
 
-    def log_critical(self, text: str) -> None:
-        self.log(LogLevel.CRITICAL, text)
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        await self.aclose()
@@ -0,0 +1,29 @@
+import argparse
+import sys
+from datetime import datetime
+
+from lab3 import LogLevel, RingBufferReader
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Восстановление записей кольцевого лога")
+    parser.add_argument("filename", help="файл RingBufferHandler")
+    parser.add_argument("--level", nargs="+", choices=[level.value for level in LogLevel],
+                        help="выводить только указанные уровни")
+    args = parser.parse_args(argv)
+
+    try:
+        reader = RingBufferReader(args.filename)
+    except (OSError, ValueError) as ex:
+        parser.error(str(ex))
+
+    levels = set(args.level) if args.level else None
+
+    for record in reader:
+        if levels is None or record.level.value in levels:
+            stamp = datetime.fromtimestamp(record.timestamp).strftime("%Y.%m.%d %H:%M:%S.%f")
+            sys.stdout.write(f"{stamp} {record.level.value} {record.message}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,10 @@ import pytest
 import tempfile
 import os
 import re
+import threading
+import time
 from unittest.mock import Mock, patch
+from labs.Lab3.lab3 import _scatter_write
 from labs.Lab3.lab3 import (
     Logger,
     LogLevel,
@@ -17,7 +20,40 @@ from labs.Lab3.lab3 import (
     StandardFormatter,
     LogFilterProtocol,
     LogHandlerProtocol,
-    LogFormatterProtocol
+    LogFormatterProtocol,
+    OverflowPolicy,
+    QueueLogger,
+    RecordQueue,
+    RotatingFileHandler,
+    MatchMode,
+    MultiPatternFilter,
+    EpochFormatter,
+    BinaryFileHandler,
+    BinaryLogReader,
+    RateLimitFilter,
+    RateLimitKey,
+    DedupFilter,
+    LogCollector,
+    RingBufferHandler,
+    RingBufferReader,
+    AsyncFileHandler,
+    AsyncLogger,
+    AsyncLogHandlerProtocol,
+    AsyncSocketHandler,
+    FanOutLogger,
+    HandlerHealth,
+    HandlerWorker,
+    BytesHandlerWorker,
+    LogBytesHandlerProtocol,
+    BoundLogger,
+    JsonFormatter,
+    StructuredMessage,
+    CompressedFileHandler,
+    CompressedLogReader,
+    CompressionMethod,
+    LogFollower,
+    HandlerRoute,
+    CaptureHandler,
 )
 
 # TODO: fix (
@@ -49,6 +85,150 @@ class TestLogger:
         assert len(logger.formatters) == 1
 
 
+class TestLevelGate:
+    """Тесты порога уровня и отложенного форматирования сообщений"""
+
+    class CountingArg:
+        def __init__(self):
+            self.calls = 0
+
+        def __str__(self):
+            self.calls += 1
+            return "arg"
+
+    def test_disabled_level_skips_rendering(self):
+        """Тест что отброшенная запись не форматируется"""
+        arg = self.CountingArg()
+        text_filter = Mock()
+        handler = Mock()
+        logger = Logger(filters=[text_filter, LevelFilter(LogLevel.INFO)],
+                        handlers=[handler], raise_on_reject=False)
+
+        logger.log_debug("value %s", arg)
+
+        assert arg.calls == 0
+        text_filter.match.assert_not_called()
+        handler.handle.assert_not_called()
+
+    def test_enabled_level_renders_args(self):
+        """Тест подстановки аргументов в стилях % и {}"""
+        handler = Mock()
+
+        Logger(handlers=[handler]).log_info("user %s, id %d", "bob", 7)
+        handler.handle.assert_called_once_with(LogLevel.INFO, "user bob, id 7")
+
+        handler.reset_mock()
+        Logger(handlers=[handler], style="{").log_info("user {}, id {}", "bob", 7)
+        handler.handle.assert_called_once_with(LogLevel.INFO, "user bob, id 7")
+
+    def test_text_without_args_is_not_formatted(self):
+        """Тест что сообщение без аргументов не интерпретируется как шаблон"""
+        handler = Mock()
+        Logger(handlers=[handler]).log_info("100% done")
+
+        handler.handle.assert_called_once_with(LogLevel.INFO, "100% done")
+
+    def test_gate_uses_strictest_level_filter(self):
+        """Тест порога по самому строгому фильтру уровня"""
+        logger = Logger(filters=[LevelFilter(LogLevel.INFO), LevelFilter(LogLevel.ERROR)])
+
+        assert logger.is_enabled_for(LogLevel.ERROR) is True
+        assert logger.is_enabled_for(LogLevel.WARNING) is False
+        assert Logger().is_enabled_for(LogLevel.DEBUG) is True
+
+    def test_filters_reassignment_recomputes_gate(self):
+        """Тест пересчета порога при замене списка фильтров"""
+        handler = Mock()
+        logger = Logger(filters=[LevelFilter(LogLevel.ERROR)], handlers=[handler])
+
+        logger.filters = []
+        logger.log_debug("debug")
+
+        handler.handle.assert_called_once_with(LogLevel.DEBUG, "debug")
+
+    def test_invalid_style(self):
+        """Тест неизвестного стиля сообщений"""
+        with pytest.raises(ValueError):
+            Logger(style="$")
+
+
+    def test_filters_mutated_in_place(self):
+        """Тест что фильтры, добавленные в список на месте, применяются"""
+        handler = Mock(spec=LogHandlerProtocol)
+        logger = Logger(handlers=[handler], raise_on_reject=False)
+
+        logger.filters.append(SimpleLogFilter("keep"))
+        logger.log_info("drop me")
+        handler.handle.assert_not_called()
+
+        logger.filters.append(LevelFilter(LogLevel.ERROR))
+        logger.log_info("keep me")
+        assert not logger.is_enabled_for(LogLevel.INFO)
+        handler.handle.assert_not_called()
+
+        logger.filters.clear()
+        logger.log_info("drop me")
+        handler.handle.assert_called_once_with(LogLevel.INFO, "drop me")
+        assert logger.filters == []
+
+class TestInstrumentation:
+    """Тесты встроенной статистики логгера"""
+
+    def test_disabled_by_default(self):
+        """Тест что без инструментирования используется обычный путь"""
+        logger = Logger()
+
+        assert logger._emit.__func__ is Logger._emit
+        assert logger._accept.__func__ is Logger._accept
+
+    def test_snapshot_counts_calls_and_errors(self):
+        """Тест счетчиков вызовов, ошибок и гистограммы"""
+        handler = Mock()
+        failing = Mock()
+        failing.handle.side_effect = [None, Exception("Handler failed")]
+        logger = Logger(filters=[SimpleLogFilter("msg")], formatters=[StandardFormatter()],
+                        handlers=[handler, failing], instrument=True)
+
+        logger.log_info("msg 1")
+        with pytest.raises(Exception, match="Handler failed"):
+            logger.log_info("msg 2")
+
+        stats = logger.stats()
+        (filter_stats,) = stats["filters"].values()
+        (formatter_stats,) = stats["formatters"].values()
+        handler_stats, failing_stats = stats["handlers"].values()
+
+        assert stats["records"] == 1
+        assert filter_stats["calls"] == 2 and formatter_stats["calls"] == 2
+        assert handler_stats["calls"] == 2 and handler_stats["errors"] == 0
+        assert failing_stats["calls"] == 2 and failing_stats["errors"] == 1
+        assert sum(handler_stats["histogram"].values()) == 2
+        assert handler_stats["mean_seconds"] > 0
+
+    def test_internal_handler_errors_are_exposed(self):
+        """Тест ошибок, которые обработчик перехватывает сам"""
+        handler = FtpHandler("ftp.example.com", 21, "user", "pass", flush_interval=None)
+        handler.errors = 3
+        logger = Logger(handlers=[handler], instrument=True)
+
+        (handler_stats,) = logger.stats()["handlers"].values()
+        assert handler_stats["internal_errors"] == 3
+
+    def test_periodic_stats_record(self):
+        """Тест периодической записи со статистикой"""
+        handler = Mock()
+        logger = Logger(handlers=[handler], stats_interval=60)
+
+        logger.log_info("first")
+        logger._next_stats = 0
+        logger.log_info("second")
+
+        messages = [call.args[1] for call in handler.handle.call_args_list]
+        assert messages[:2] == ["first", "second"]
+        assert messages[2].startswith("logger stats {")
+        assert '"records": 2' in messages[2]
+
+
 class TestSimpleLogFilter:
     """Тесты для класса SimpleLogFilter"""
     
@@ -103,6 +283,213 @@ class TestReLogFilter:
         assert filter_obj.match(LogLevel.INFO, "This is an error") is False
 
 
+class TestMultiPatternFilter:
+    """Тесты объединенного фильтра по множеству шаблонов"""
+
+    def test_any_keywords_case_insensitive(self):
+        """Тест совпадения любого ключевого слова без учета регистра"""
+        filter_obj = MultiPatternFilter(keywords=["timeout", "Refused", "time"])
+
+        assert filter_obj.match(LogLevel.INFO, "Connection REFUSED") is True
+        assert filter_obj.match(LogLevel.INFO, "read TimeOut") is True
+        assert filter_obj.match(LogLevel.INFO, "all good") is False
+
+    def test_any_with_regex(self):
+        """Тест совпадения по регулярному выражению"""
+        filter_obj = MultiPatternFilter(keywords=["timeout"], patterns=[r"\d{4}-\d{2}-\d{2}"])
+
+        assert filter_obj.match(LogLevel.INFO, "Date: 2024-01-15") is True
+        assert filter_obj.match(LogLevel.INFO, "Date: 2024/01/15") is False
+
+    def test_all_mode(self):
+        """Тест режима, когда должны совпасть все шаблоны"""
+        filter_obj = MultiPatternFilter(keywords=["database", "data"],
+                                        patterns=[r"ERROR", r"\bid=\d+"],
+                                        mode=MatchMode.ALL)
+
+        assert filter_obj.match(LogLevel.ERROR, "ERROR Database id=42 down") is True
+        assert filter_obj.match(LogLevel.ERROR, "error Database id=42 down") is False
+        assert filter_obj.match(LogLevel.ERROR, "ERROR Database down") is False
+
+    def test_keyword_prefixes_and_special_characters(self):
+        """Тест ключевых слов, являющихся префиксами друг друга, и спецсимволов"""
+        filter_obj = MultiPatternFilter(keywords=[f"user{i}@example.com" for i in range(150)])
+
+        assert filter_obj.match(LogLevel.INFO, "mail to user1@example.com") is True
+        assert filter_obj.match(LogLevel.INFO, "mail to user149@example.com") is True
+        assert filter_obj.match(LogLevel.INFO, "mail to user150@example.com") is False
+        assert filter_obj.match(LogLevel.INFO, "mail to user1@exampleXcom") is False
+
+    def test_empty_keyword_matches_everything(self):
+        """Тест пустого ключевого слова, как у SimpleLogFilter"""
+        assert MultiPatternFilter(keywords=[""]).match(LogLevel.INFO, "Any message") is True
+
+    def test_invalid_pattern(self):
+        """Тест с некорректным регулярным выражением"""
+        with pytest.raises(ValueError):
+            MultiPatternFilter(patterns=[r"(\d+"])
+
+
+class TestRateLimitFilter:
+    """Тесты фильтра ограничения частоты"""
+
+    def test_burst_then_refill(self):
+        """Тест пачки записей и пополнения токенов"""
+        filter_obj = RateLimitFilter(rate=2, burst=3)
+
+        with patch("labs.Lab3.lab3.time.monotonic", return_value=100.0):
+            results = [filter_obj.match(LogLevel.ERROR, "boom") for _ in range(5)]
+
+        assert results == [True, True, True, False, False]
+        assert filter_obj.suppressed == 2
+
+        with patch("labs.Lab3.lab3.time.monotonic", return_value=100.5):
+            assert filter_obj.match(LogLevel.ERROR, "boom") is True
+            assert filter_obj.match(LogLevel.ERROR, "boom") is False
+
+    def test_per_level_buckets(self):
+        """Тест отдельных корзин для уровней"""
+        filter_obj = RateLimitFilter(rate=1, burst=1)
+
+        with patch("labs.Lab3.lab3.time.monotonic", return_value=0.0):
+            assert filter_obj.match(LogLevel.ERROR, "a") is True
+            assert filter_obj.match(LogLevel.ERROR, "b") is False
+            assert filter_obj.match(LogLevel.INFO, "c") is True
+
+    def test_per_message_with_bounded_keys(self):
+        """Тест корзин по сообщению с ограничением числа ключей"""
+        filter_obj = RateLimitFilter(rate=1, burst=1, key=RateLimitKey.MESSAGE, max_keys=2)
+
+        with patch("labs.Lab3.lab3.time.monotonic", return_value=0.0):
+            for message in ("a", "b", "c"):
+                assert filter_obj.match(LogLevel.INFO, message) is True
+
+            assert len(filter_obj._buckets) == 2
+            assert filter_obj.match(LogLevel.INFO, "c") is False
+            # ключ "a" вытеснен, поэтому для него корзина создается заново
+            assert filter_obj.match(LogLevel.INFO, "a") is True
+
+
+class TestDedupFilter:
+    """Тесты фильтра подавления повторов"""
+
+    def test_duplicates_collapsed_with_count(self):
+        """Тест схлопывания повторов в одну запись с их числом"""
+        handler = Mock()
+        dedup = DedupFilter(window=1.0)
+        logger = Logger(filters=[dedup], handlers=[handler], raise_on_reject=False)
+
+        with patch("labs.Lab3.lab3.time.monotonic", return_value=0.0):
+            for _ in range(1000):
+                logger.log_error("disk full")
+            logger.log_error("other")
+
+        with patch("labs.Lab3.lab3.time.monotonic", return_value=1.5):
+            logger.log_error("disk full")
+            logger.log_error("disk full")
+
+        dedup.close()
+
+        messages = [call.args[1] for call in handler.handle.call_args_list]
+        assert messages == ["disk full", "other", "disk full [repeated 999 times]",
+                            "disk full", "disk full [repeated 1 times]"]
+        assert dedup.suppressed == 1000
+
+    def test_summary_emitted_when_window_closes(self):
+        """Тест выдачи сводки по закрытию окна без новых записей"""
+        handler = Mock()
+        dedup = DedupFilter(window=0.05)
+        logger = Logger(filters=[dedup], handlers=[handler], raise_on_reject=False)
+
+        for _ in range(10):
+            logger.log_warning("retrying")
+
+        assert wait_until(lambda: handler.handle.call_count == 2)
+
+        messages = [call.args[1] for call in handler.handle.call_args_list]
+        assert messages == ["retrying", "retrying [repeated 9 times]"]
+        dedup.close()
+
+    def test_summary_flushed_on_shutdown(self):
+        """Тест выдачи накопленной сводки при остановке логгера"""
+        handler = Mock()
+        dedup = DedupFilter(window=60)
+        logger = QueueLogger(filters=[dedup], handlers=[handler], raise_on_reject=False)
+
+        for _ in range(5):
+            logger.log_info("tick")
+
+        logger.shutdown()
+
+        messages = [call.args[1] for call in handler.handle.call_args_list]
+        assert messages == ["tick", "tick [repeated 4 times]"]
+
+    def test_summary_from_timer_with_async_logger(self):
+        """Тест доставки сводки от таймера в цикл событий AsyncLogger"""
+        import asyncio
+
+        handler = Mock(spec=LogHandlerProtocol)
+
+        async def scenario():
+            dedup = DedupFilter(window=0.05)
+
+            async with AsyncLogger(filters=[dedup], handlers=[handler],
+                                   raise_on_reject=False) as logger:
+                for _ in range(3):
+                    await logger.alog_error("disk full")
+
+                for _ in range(100):
+                    if handler.handle.call_count == 2:
+                        break
+                    await asyncio.sleep(0.01)
+
+        with patch("builtins.print") as mock_print:
+            asyncio.run(scenario())
+
+        mock_print.assert_not_called()
+        messages = [call.args[1] for call in handler.handle.call_args_list]
+        assert messages == ["disk full", "disk full [repeated 2 times]"]
+
+    def test_filter_not_kept_alive_without_pending_summary(self):
+        """Тест что фильтр без ожидающих сводок не удерживается до выхода"""
+        import gc
+        import weakref
+
+        handler = Mock()
+        dedup = DedupFilter(window=0.01)
+        logger = Logger(filters=[dedup], handlers=[handler], raise_on_reject=False)
+
+        for _ in range(3):
+            logger.log_info("tick")
+
+        assert wait_until(lambda: handler.handle.call_count == 2)
+        assert wait_until(lambda: not any(isinstance(thread, threading.Timer)
+                                          for thread in threading.enumerate()))
+        refs = weakref.ref(dedup), weakref.ref(logger)
+        del dedup, logger
+        gc.collect()
+
+        assert refs[0]() is None and refs[1]() is None
+
+    def test_level_is_part_of_key(self):
+        """Тест что одинаковый текст разных уровней не схлопывается"""
+        dedup = DedupFilter(window=10)
+
+        with patch("labs.Lab3.lab3.time.monotonic", return_value=0.0):
+            assert dedup.match(LogLevel.INFO, "msg") is True
+            assert dedup.match(LogLevel.ERROR, "msg") is True
+            assert dedup.match(LogLevel.ERROR, "msg") is False
+
+    def test_bounded_memory(self):
+        """Тест ограничения числа отслеживаемых сообщений"""
+        dedup = DedupFilter(window=10, max_keys=100)
+
+        for i in range(1000):
+            dedup.match(LogLevel.INFO, f"message {i}")
+
+        assert len(dedup._seen) == 100
+
+
 class TestLevelFilter:
     """Тесты для класса LevelFilter"""
     
@@ -137,6 +524,213 @@ class TestLevelFilter:
         assert critical_filter.match(LogLevel.CRITICAL, "Critical message") is True
 
 
+class TestHandlerRoute:
+    """Тесты уровней и фильтров отдельных обработчиков"""
+
+    def test_levels_per_handler(self):
+        """Тест что каждый обработчик получает записи своего уровня"""
+        file_handler = Mock(spec=LogHandlerProtocol)
+        socket_handler = Mock(spec=LogHandlerProtocol)
+        logger = Logger(handlers=[file_handler,
+                                  HandlerRoute(socket_handler, level=LogLevel.ERROR)])
+
+        logger.log_debug("debug")
+        logger.log_error("error")
+
+        assert [c.args for c in file_handler.handle.call_args_list] == [
+            (LogLevel.DEBUG, "debug"), (LogLevel.ERROR, "error"),
+        ]
+        socket_handler.handle.assert_called_once_with(LogLevel.ERROR, "error")
+
+    def test_route_filters(self):
+        """Тест фильтров маршрута поверх фильтров логгера"""
+        alerts = Mock(spec=LogHandlerProtocol)
+        everything = Mock(spec=LogHandlerProtocol)
+        logger = Logger(handlers=[HandlerRoute(alerts, filters=[SimpleLogFilter("disk")]),
+                                  everything])
+
+        logger.log_warning("disk almost full")
+        logger.log_warning("cpu busy")
+
+        alerts.handle.assert_called_once_with(LogLevel.WARNING, "disk almost full")
+        assert everything.handle.call_count == 2
+
+    def test_format_once_per_chain(self):
+        """Тест ленивого форматирования: один раз на используемую цепочку"""
+        shared = Mock(spec=LogFormatterProtocol)
+        shared.format.side_effect = lambda level, text: f"shared {text}"
+        own = Mock(spec=LogFormatterProtocol)
+        own.format.side_effect = lambda level, text: f"own {text}"
+        first, second, third = (Mock(spec=LogHandlerProtocol) for _ in range(3))
+
+        logger = Logger(handlers=[HandlerRoute(first), HandlerRoute(second),
+                                  HandlerRoute(third, level=LogLevel.ERROR, formatters=[own])],
+                        formatters=[shared])
+
+        logger.log_info("record")
+
+        assert shared.format.call_count == 1
+        own.format.assert_not_called()
+        second.handle.assert_called_once_with(LogLevel.INFO, "shared record")
+
+        logger.log_error("failure")
+
+        assert shared.format.call_count == 2
+        third.handle.assert_called_once_with(LogLevel.ERROR, "own failure")
+
+    def test_skip_when_no_route_accepts(self):
+        """Тест что запись ниже уровней всех маршрутов не подставляется и не форматируется"""
+        from unittest.mock import MagicMock
+
+        formatter = Mock(spec=LogFormatterProtocol)
+        argument = MagicMock()
+        logger = Logger(handlers=[HandlerRoute(Mock(spec=LogHandlerProtocol), level=LogLevel.ERROR)],
+                        formatters=[formatter])
+
+        logger.log_info("value %s", argument)
+
+        assert not logger.is_enabled_for(LogLevel.INFO)
+        assert logger.is_enabled_for(LogLevel.CRITICAL)
+        argument.__str__.assert_not_called()
+        formatter.format.assert_not_called()
+
+    def test_logger_gate_still_rejects(self):
+        """Тест что фильтр уровня логгера по-прежнему отклоняет запись"""
+        logger = Logger(filters=[LevelFilter(LogLevel.WARNING)],
+                        handlers=[HandlerRoute(Mock(spec=LogHandlerProtocol))])
+
+        with pytest.raises(Exception, match="LevelFilter"):
+            logger.log_info("below gate")
+
+    def test_bytes_encoded_once_per_chain(self):
+        """Тест что маршруты с общей цепочкой получают одни и те же байты"""
+        first = Mock(spec=LogBytesHandlerProtocol)
+        second = Mock(spec=LogBytesHandlerProtocol)
+
+        Logger(handlers=[HandlerRoute(first), second]).log_info("shared")
+
+        assert first.handle_bytes.call_args.args[1] is second.handle_bytes.call_args.args[1]
+
+    def test_routes_appended_in_place(self):
+        """Тест маршрута, добавленного в список обработчиков на месте"""
+        plain = Mock(spec=LogHandlerProtocol)
+        errors = Mock(spec=LogHandlerProtocol)
+        logger = Logger(handlers=[plain])
+
+        logger.handlers.append(HandlerRoute(errors, level=LogLevel.ERROR))
+        logger.log_info("info")
+        logger.log_error("error")
+
+        assert plain.handle.call_count == 2
+        errors.handle.assert_called_once_with(LogLevel.ERROR, "error")
+
+        logger.handlers.pop(0)
+        logger.log_info("nobody wants it")
+        assert plain.handle.call_count == 2
+        assert not logger.is_enabled_for(LogLevel.INFO)
+
+    def test_bound_logger_below_routes(self):
+        """Тест что связанный логгер молча пропускает запись, не нужную маршрутам"""
+        handler = Mock(spec=LogHandlerProtocol)
+        logger = Logger(handlers=[HandlerRoute(handler, level=LogLevel.ERROR)])
+        bound = logger.bind(a=1)
+
+        bound.log(LogLevel.INFO, "skipped")
+        bound.log_error("delivered")
+
+        handler.handle.assert_called_once_with(LogLevel.ERROR, "delivered a=1")
+
+        gated = Logger(filters=[LevelFilter(LogLevel.WARNING)], handlers=[handler]).bind(a=1)
+        with pytest.raises(Exception, match="LevelFilter"):
+            gated.log_info("below gate")
+
+    def test_async_logger_below_routes(self):
+        """Тест что alog не тратит фильтры на запись, не нужную маршрутам"""
+        import asyncio
+
+        handler = Mock(spec=LogHandlerProtocol)
+        limiter = Mock(spec=LogFilterProtocol)
+        limiter.match.return_value = True
+
+        async def scenario():
+            async with AsyncLogger(filters=[limiter],
+                                   handlers=[HandlerRoute(handler, level=LogLevel.ERROR)]) as logger:
+                await logger.alog(LogLevel.INFO, "skipped %d", 1)
+                await logger.alog_error("delivered")
+
+        asyncio.run(scenario())
+
+        limiter.match.assert_called_once_with(LogLevel.ERROR, "delivered")
+        handler.handle.assert_called_once_with(LogLevel.ERROR, "delivered")
+
+    def test_fan_out_routes(self):
+        """Тест маршрутов в FanOutLogger"""
+        errors = Mock(spec=LogHandlerProtocol)
+
+        with FanOutLogger(handlers=[HandlerRoute(errors, level=LogLevel.ERROR)]) as logger:
+            assert isinstance(logger.handlers[0].handler, HandlerWorker)
+            logger.log_warning("skipped")
+            logger.log_critical("delivered")
+            assert logger.flush(timeout=5)
+
+        errors.handle.assert_called_once_with(LogLevel.CRITICAL, "delivered")
+
+
+class TestCaptureHandler:
+    """Тесты захвата записей в память с индексированным поиском"""
+
+    def fill(self, handler, count):
+        levels = [LogLevel.INFO, LogLevel.ERROR, LogLevel.DEBUG]
+        times = iter(range(1, count + 1))
+
+        with patch("labs.Lab3.lab3.time.time", side_effect=lambda: float(next(times))):
+            for i in range(count):
+                status = "disk timeout" if i % 4 == 0 else "ok"
+                handler.handle(levels[i % 3], f"request {i} {status}")
+
+    @pytest.mark.parametrize("index_tokens", [True, False])
+    def test_query(self, index_tokens):
+        """Тест запроса по уровню, словам и времени с индексом слов и без него"""
+        handler = CaptureHandler(index_tokens=index_tokens)
+        self.fill(handler, 30)
+
+        errors = handler.query(level=LogLevel.ERROR, contains="Disk TIMEOUT", since=10, until=25)
+
+        assert [r.message for r in errors] == ["request 16 disk timeout"]
+        assert errors[0].timestamp == 17.0 and errors[0].level == LogLevel.ERROR
+        assert len(handler.query(contains="timeout")) == 8
+        assert len(handler.query(level=[LogLevel.INFO, LogLevel.DEBUG])) == 20
+        assert [r.message for r in handler.query(limit=2)] == ["request 0 disk timeout",
+                                                              "request 1 ok"]
+        assert handler.query(contains="time") == []
+
+    def test_bounded_with_eviction(self):
+        """Тест что хранятся последние capacity записей и индексы не растут"""
+        handler = CaptureHandler(capacity=5)
+        self.fill(handler, 12)
+
+        assert len(handler) == 5
+        assert [r.message for r in handler.query()] == [f"request {i} {'disk timeout' if i % 4 == 0 else 'ok'}"
+                                                        for i in range(7, 12)]
+        assert handler.query(contains="request 4") == []
+        assert [r.message for r in handler.query(contains="timeout")] == ["request 8 disk timeout"]
+        assert "0" not in handler._tokens
+
+    def test_capture_from_logger(self):
+        """Тест использования вместо mock-обработчика"""
+        handler = CaptureHandler()
+        logger = Logger(handlers=[handler], formatters=[StandardFormatter()])
+
+        logger.log_warning("cache miss key=%s", "user:1")
+        logger.log_error("db timeout")
+
+        assert [r.level for r in handler.query()] == [LogLevel.WARNING, LogLevel.ERROR]
+        assert handler.query(contains="user 1")[0].message.endswith("cache miss key=user:1")
+
+        handler.clear()
+        assert len(handler) == 0 and handler.query(contains="db") == []
+
+
 class TestConsoleHandler:
     """Тесты для класса ConsoleHandler"""
     
@@ -149,42 +743,650 @@ class TestConsoleHandler:
         mock_print.assert_called_once_with("Test message")
 
 
-class TestFileHandler:
-    """Тесты для класса FileHandler"""
-    
-    def test_file_handler_write(self):
-        """Тест записи в файл"""
-        with tempfile.NamedTemporaryFile(mode='w', delete=False, encoding='utf-8') as temp_file:
-            temp_filename = temp_file.name
-        
-        try:
-            handler = FileHandler(temp_filename)
-            handler.handle(LogLevel.INFO, "Test log message")
-            
-            with open(temp_filename, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
-            
-            assert content == "Test log message"
-        finally:
-            os.unlink(temp_filename)
-    
-    def test_file_handler_append_mode(self):
-        """Тест что файл открывается в режиме добавления"""
-        with tempfile.NamedTemporaryFile(mode='w', delete=False, encoding='utf-8') as temp_file:
-            temp_filename = temp_file.name
-            temp_file.write("Existing content\n")
-        
-        try:
-            handler = FileHandler(temp_filename)
-            handler.handle(LogLevel.WARNING, "New log message")
-            
-            with open(temp_filename, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            assert "Existing content" in content
-            assert "New log message" in content
-        finally:
-            os.unlink(temp_filename)
+class TestFileHandler:
+    """Тесты для класса FileHandler"""
+    
+    def test_file_handler_write(self):
+        """Тест записи в файл"""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, encoding='utf-8') as temp_file:
+            temp_filename = temp_file.name
+        
+        try:
+            handler = FileHandler(temp_filename)
+            handler.handle(LogLevel.INFO, "Test log message")
+            
+            with open(temp_filename, 'r', encoding='utf-8') as f:
+                content = f.read().strip()
+            
+            assert content == "Test log message"
+        finally:
+            os.unlink(temp_filename)
+    
+    def test_file_handler_append_mode(self):
+        """Тест что файл открывается в режиме добавления"""
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, encoding='utf-8') as temp_file:
+            temp_filename = temp_file.name
+            temp_file.write("Existing content\n")
+        
+        try:
+            handler = FileHandler(temp_filename)
+            handler.handle(LogLevel.WARNING, "New log message")
+            
+            with open(temp_filename, 'r', encoding='utf-8') as f:
+                content = f.read()
+            
+            assert "Existing content" in content
+            assert "New log message" in content
+        finally:
+            os.unlink(temp_filename)
+
+
+    def test_file_handler_keeps_file_open(self):
+        """Тест что файл открывается один раз"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.log")
+
+            with patch("builtins.open", wraps=open) as mock_open:
+                with FileHandler(path) as handler:
+                    for i in range(10):
+                        handler.handle(LogLevel.INFO, f"line {i}")
+
+            assert mock_open.call_count == 1
+
+            with open(path, encoding="utf-8") as f:
+                assert f.read().splitlines() == [f"line {i}" for i in range(10)]
+
+    def test_file_handler_flush_every(self):
+        """Тест сброса буфера каждые N записей"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.log")
+            handler = FileHandler(path, flush_every=3)
+
+            handler.handle(LogLevel.INFO, "one")
+            handler.handle(LogLevel.INFO, "two")
+            assert os.path.getsize(path) == 0
+
+            handler.handle(LogLevel.INFO, "three")
+            assert os.path.getsize(path) == len("one\ntwo\nthree\n")
+
+            handler.close()
+
+    def test_file_handler_flush_on_error_level(self):
+        """Тест сброса буфера на записи уровня ERROR"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.log")
+            handler = FileHandler(path, flush_every=None)
+
+            handler.handle(LogLevel.WARNING, "warning")
+            assert os.path.getsize(path) == 0
+
+            handler.handle(LogLevel.ERROR, "error")
+            assert os.path.getsize(path) > 0
+
+            handler.close()
+
+    def test_file_handler_flush_interval_and_fsync(self):
+        """Тест сброса по времени с fsync"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.log")
+            handler = FileHandler(path, flush_every=None, flush_level=None,
+                                  flush_interval_ms=0, fsync=True)
+
+            with patch("labs.Lab3.lab3.os.fsync") as mock_fsync:
+                handler.handle(LogLevel.DEBUG, "debug")
+
+            mock_fsync.assert_called_once()
+            assert os.path.getsize(path) > 0
+            handler.close()
+
+    def test_file_handler_flush_interval_when_idle(self):
+        """Тест сброса по времени без последующих записей"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.log")
+            handler = FileHandler(path, flush_every=None, flush_level=None,
+                                  flush_interval_ms=10)
+
+            handler.handle(LogLevel.INFO, "idle")
+
+            assert wait_until(lambda: os.path.getsize(path) == len("idle\n"), timeout=0.1)
+            handler.close()
+            assert handler._flusher is None
+
+    def test_file_handler_invalid_flush_every(self):
+        """Тест некорректного flush_every"""
+        with pytest.raises(ValueError):
+            FileHandler("app.log", flush_every=0)
+
+
+class TestRotatingFileHandler:
+    """Тесты обработчика с ротацией файлов"""
+
+    def test_rotation_by_size_with_compression(self):
+        """Тест ротации по размеру и сжатия сегментов"""
+        import gzip
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.log")
+            handler = RotatingFileHandler(path, max_bytes=100)
+
+            lines = [f"record number {i:04d}" for i in range(20)]
+            for line in lines:
+                handler.handle(LogLevel.INFO, line)
+            handler.close()
+
+            segments = handler.rotated_segments()
+            assert segments and all(name.endswith(".gz") for name in segments)
+
+            restored = []
+            for segment in segments:
+                with gzip.open(segment, "rt", encoding="utf-8") as f:
+                    restored += f.read().splitlines()
+            with open(path, encoding="utf-8") as f:
+                restored += f.read().splitlines()
+
+            assert restored == lines
+            assert os.path.getsize(path) <= 100
+
+    def test_rotation_by_interval(self):
+        """Тест ротации по времени без сжатия"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.log")
+            handler = RotatingFileHandler(path, interval=0.01, compress=False)
+
+            handler.handle(LogLevel.INFO, "first")
+            handler._rollover_at = 0
+            handler.handle(LogLevel.INFO, "second")
+            handler.close()
+
+            segments = handler.rotated_segments()
+            assert len(segments) == 1
+            with open(segments[0], encoding="utf-8") as f:
+                assert f.read() == "first\n"
+
+    def test_retention_by_count(self):
+        """Тест удаления старых сегментов по количеству"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.log")
+            handler = RotatingFileHandler(path, max_bytes=10, backup_count=2)
+
+            for i in range(10):
+                handler.handle(LogLevel.INFO, f"record {i}")
+            handler.close()
+
+            segments = handler.rotated_segments()
+            assert len(segments) == 2
+            assert segments[-1].endswith(".gz")
+
+    def test_retention_under_rotation_burst(self):
+        """Тест что частые ротации с малым backup_count не ломают сжатие"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.log")
+            handler = RotatingFileHandler(path, max_bytes=20, backup_count=2)
+
+            with patch("builtins.print") as mock_print:
+                for i in range(50):
+                    handler.handle(LogLevel.INFO, f"record {i:02d}")
+                handler.close()
+
+            mock_print.assert_not_called()
+            assert handler.errors == 0
+
+            segments = handler.rotated_segments()
+            assert len(segments) == 2
+            assert all(name.endswith(".gz") for name in segments)
+
+    def test_retention_keeps_unrelated_files(self):
+        """Тест что чужие файлы с тем же префиксом не считаются сегментами"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.log")
+            unrelated = [f"{path}.bak-important", f"{path}.idx"]
+            for name in unrelated:
+                open(name, "wb").close()
+
+            handler = RotatingFileHandler(path, max_bytes=10, backup_count=1)
+            for i in range(5):
+                handler.handle(LogLevel.INFO, f"record {i}")
+            handler.close()
+
+            assert all(os.path.exists(name) for name in unrelated)
+            segments = handler.rotated_segments()
+            assert len(segments) == 1 and segments[0].endswith(".gz")
+
+    def test_retention_by_age(self):
+        """Тест удаления сегментов по возрасту"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.log")
+            old_segment = f"{path}.20000101-000000-000000.gz"
+            open(old_segment, "wb").close()
+            os.utime(old_segment, (0, 0))
+
+            handler = RotatingFileHandler(path, max_bytes=10, max_age=3600)
+            handler.handle(LogLevel.INFO, "first record")
+            handler.handle(LogLevel.INFO, "second record")
+            handler.close()
+
+            assert not os.path.exists(old_segment)
+            assert len(handler.rotated_segments()) == 1
+
+
+class TestBinaryLog:
+    """Тесты бинарного лога с индексом"""
+
+    def write_records(self, path, count, index_every=4):
+        levels = [LogLevel.DEBUG, LogLevel.INFO, LogLevel.ERROR]
+        times = iter(range(1_000_000_000, 1_000_000_000 + count * 1_000_000_000, 1_000_000_000))
+
+        with patch("labs.Lab3.lab3.time.time_ns", side_effect=lambda: next(times)):
+            with BinaryFileHandler(path, index_every=index_every) as handler:
+                for i in range(count):
+                    handler.handle(levels[i % 3], f"сообщение {i}")
+
+    def test_roundtrip(self):
+        """Тест записи и чтения всех записей"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.blog")
+            self.write_records(path, 10)
+
+            with BinaryLogReader(path) as reader:
+                records = list(reader)
+
+            assert [r.message for r in records] == [f"сообщение {i}" for i in range(10)]
+            assert records[2].level == LogLevel.ERROR
+            assert records[0].timestamp == 1.0
+            assert len(reader.blocks) == 3
+
+    def test_query_by_level_and_time(self):
+        """Тест запроса по уровню и временному окну"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.blog")
+            self.write_records(path, 30)
+
+            with BinaryLogReader(path) as reader:
+                errors = list(reader.query(levels=[LogLevel.ERROR], since=10, until=20))
+
+            assert [r.message for r in errors] == [f"сообщение {i}" for i in (11, 14, 17)]
+
+    def test_query_skips_blocks_by_index(self):
+        """Тест что неподходящие блоки не разбираются"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.blog")
+            self.write_records(path, 40, index_every=10)
+
+            with BinaryLogReader(path) as reader:
+                with patch.object(reader, "_scan", wraps=reader._scan) as mock_scan:
+                    records = list(reader.query(since=25, until=27))
+
+            assert [r.message for r in records] == [f"сообщение {i}" for i in (24, 25, 26)]
+            # один подходящий блок и пустой хвост
+            assert mock_scan.call_count == 2
+
+    def test_query_bounds_include_record_timestamp(self):
+        """Тест что границы, взятые из времени записи, включают саму запись"""
+        # время в нс, для которого int(нс / 1e9 * 1e9) больше исходного
+        times = iter([1700000000123456896 + i for i in range(0, 3000, 1000)])
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.blog")
+
+            with patch("labs.Lab3.lab3.time.time_ns", side_effect=lambda: next(times)):
+                with BinaryFileHandler(path, index_every=2) as handler:
+                    for i in range(3):
+                        handler.handle(LogLevel.INFO, f"сообщение {i}")
+
+            with BinaryLogReader(path) as reader:
+                records = list(reader)
+
+                for record in records:
+                    assert list(reader.query(since=record.timestamp,
+                                             until=record.timestamp)) == [record]
+                    assert list(reader.query(since=record.timestamp))[0] == record
+                    assert list(reader.query(until=record.timestamp))[-1] == record
+
+    def test_unindexed_tail_and_append(self):
+        """Тест чтения хвоста без индекса и дозаписи в существующий файл"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.blog")
+            self.write_records(path, 5)
+
+            handler = BinaryFileHandler(path, index_every=100)
+            handler.handle(LogLevel.CRITICAL, "tail")
+            handler.flush()
+
+            with BinaryLogReader(path) as reader:
+                records = list(reader.query(levels=[LogLevel.CRITICAL]))
+
+            handler.close()
+            assert [r.message for r in records] == ["tail"]
+
+    def test_restart_after_unclosed_run(self):
+        """Тест дозаписи после запуска без close() с недописанной записью"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.blog")
+
+            crashed = BinaryFileHandler(path, index_every=2)
+            for i in range(5):
+                crashed.handle(LogLevel.INFO, f"старый {i}")
+            crashed.flush()
+
+            with open(path, "ab") as f:
+                f.write(b"\x10\x00\x00")  # оборванный заголовок записи
+
+            with BinaryFileHandler(path, index_every=2) as handler:
+                for i in range(4):
+                    handler.handle(LogLevel.ERROR, f"новый {i}")
+
+            with BinaryLogReader(path) as reader:
+                records = list(reader)
+                errors = list(reader.query(levels=[LogLevel.ERROR]))
+
+            assert [r.message for r in records] == (
+                [f"старый {i}" for i in range(5)] + [f"новый {i}" for i in range(4)]
+            )
+            assert len(errors) == 4
+            # блоки по 2 записи, хвостовая запись старого запуска продолжает блок
+            assert [entry[4] for entry in reader.blocks] == [2, 2, 2, 2, 1]
+
+    def test_flush_writes_index(self):
+        """Тест что flush сбрасывает и индекс"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.blog")
+            handler = BinaryFileHandler(path, index_every=2)
+
+            for i in range(4):
+                handler.handle(LogLevel.INFO, f"сообщение {i}")
+            handler.flush()
+
+            with BinaryLogReader(path) as reader:
+                assert len(reader.blocks) == 2
+                assert len(list(reader)) == 4
+
+            handler.close()
+
+    def test_not_a_binary_log(self):
+        """Тест открытия файла другого формата"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.log")
+            with open(path, "w") as f:
+                f.write("plain text log\n")
+
+            with pytest.raises(ValueError):
+                BinaryLogReader(path)
+
+
+class TestRingBuffer:
+    """Тесты кольцевого лога на mmap"""
+
+    def test_roundtrip(self):
+        """Тест записи и восстановления записей по порядку"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.ring")
+
+            with RingBufferHandler(path, capacity=4096) as handler:
+                for i in range(5):
+                    handler.handle(LogLevel.INFO, f"сообщение {i}")
+
+            records = list(RingBufferReader(path))
+
+            assert [r.message for r in records] == [f"сообщение {i}" for i in range(5)]
+            assert records[0].level == LogLevel.INFO
+            assert os.path.getsize(path) == 4096 + 32
+
+    def test_wraparound_keeps_newest(self):
+        """Тест перезаписи старых записей при заполнении кольца"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.ring")
+
+            with RingBufferHandler(path, capacity=256) as handler:
+                for i in range(100):
+                    handler.handle(LogLevel.DEBUG, f"record {i:03d}")
+
+            reader = RingBufferReader(path)
+            messages = [r.message for r in reader]
+
+            assert messages[-1] == "record 099"
+            assert messages == [f"record {i:03d}" for i in range(100 - len(messages), 100)]
+            assert reader.cursor - reader.head <= 256
+            assert len(messages) == 256 // (13 + 10)
+
+    def test_survives_crash(self):
+        """Тест чтения кольца после аварийного завершения процесса без close"""
+        import multiprocessing
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.ring")
+            process = multiprocessing.Process(target=_ring_crash_worker, args=(path, 50))
+            process.start()
+            process.join()
+
+            assert process.exitcode == 3
+            messages = [r.message for r in RingBufferReader(path)]
+            assert messages[-1] == "before crash 49"
+            assert len(messages) > 1
+
+    def test_reopen_continues_ring(self):
+        """Тест продолжения существующего кольца при повторном открытии"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.ring")
+
+            with RingBufferHandler(path, capacity=1024) as handler:
+                handler.handle(LogLevel.INFO, "first run")
+
+            with RingBufferHandler(path, capacity=1024) as handler:
+                handler.handle(LogLevel.INFO, "second run")
+
+            assert [r.message for r in RingBufferReader(path)] == ["first run", "second run"]
+
+    def test_dump_on_critical(self):
+        """Тест выгрузки кольца в обработчик при CRITICAL без повторов"""
+        dump = Mock(spec=LogHandlerProtocol)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.ring")
+
+            with RingBufferHandler(path, capacity=1024, dump_handler=dump) as handler:
+                handler.handle(LogLevel.DEBUG, "context")
+                dump.handle.assert_not_called()
+
+                handler.handle(LogLevel.CRITICAL, "boom")
+                handler.handle(LogLevel.INFO, "after")
+                handler.handle(LogLevel.CRITICAL, "boom again")
+
+        assert [c.args for c in dump.handle.call_args_list] == [
+            (LogLevel.DEBUG, "context"),
+            (LogLevel.CRITICAL, "boom"),
+            (LogLevel.INFO, "after"),
+            (LogLevel.CRITICAL, "boom again"),
+        ]
+
+    def test_not_a_ring_log(self):
+        """Тест открытия файла другого формата"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.log")
+            with open(path, "w") as f:
+                f.write("plain text log\n")
+
+            with pytest.raises(ValueError):
+                RingBufferReader(path)
+
+
+def _ring_crash_worker(path, count):
+    handler = RingBufferHandler(path, capacity=512)
+
+    for i in range(count):
+        handler.handle(LogLevel.INFO, f"before crash {i}")
+
+    os._exit(3)
+
+
+class TestCompressedFileHandler:
+    """Тесты сжатого лога из независимых блоков"""
+
+    @pytest.mark.parametrize("method", list(CompressionMethod))
+    def test_roundtrip(self, method):
+        """Тест записи и чтения стандартными средствами и CompressedLogReader"""
+        import gzip
+        import lzma
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, f"app.log.{method.value}")
+
+            with CompressedFileHandler(path, method, block_size=1000) as handler:
+                for i in range(200):
+                    handler.handle(LogLevel.INFO, f"request {i} status=ok")
+
+            opener = gzip.open if method is CompressionMethod.GZIP else lzma.open
+            with opener(path, "rt", encoding="utf-8") as f:
+                assert f.read().splitlines() == [f"request {i} status=ok" for i in range(200)]
+
+            assert list(CompressedLogReader(path)) == [f"request {i} status=ok" for i in range(200)]
+            assert handler.blocks > 1
+
+    def test_read_while_writing(self):
+        """Тест чтения завершенных блоков, пока файл пишется"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.log.gz")
+
+            with CompressedFileHandler(path, block_size=10_000) as handler:
+                handler.handle(LogLevel.INFO, "first block")
+                handler.handle(LogLevel.ERROR, "closes block early")
+                handler.handle(LogLevel.INFO, "still buffered")
+
+                assert list(CompressedLogReader(path)) == ["first block", "closes block early"]
+
+                # недописанный член в конце файла пропускается
+                with open(path, "ab") as f:
+                    f.write(b"\x1f\x8b\x08\x00")
+
+                assert len(list(CompressedLogReader(path))) == 2
+
+    def test_records_split_on_newline_only(self):
+        """Тест что \\r и другие разделители splitlines не делят запись"""
+        records = ["a\rb\x1cc", "x y\x85z", ""]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.log.gz")
+
+            with CompressedFileHandler(path) as handler:
+                for record in records:
+                    handler.handle(LogLevel.INFO, record)
+
+            assert list(CompressedLogReader(path)) == records
+
+    def test_stats(self):
+        """Тест статистики сжатия"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.log.gz")
+
+            with CompressedFileHandler(path, block_size=64 * 1024) as handler:
+                for i in range(5000):
+                    handler.handle(LogLevel.INFO, f"GET /api/items/{i % 50} 200 12ms")
+
+            stats = handler.stats()
+
+            assert stats["raw_bytes"] == sum(len(f"GET /api/items/{i % 50} 200 12ms\n")
+                                             for i in range(5000))
+            assert stats["compressed_bytes"] == os.path.getsize(path)
+            assert stats["ratio"] > 5
+            assert stats["cpu_seconds_per_mb"] >= 0
+
+    def test_not_a_compressed_log(self):
+        """Тест открытия файла другого формата"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.log")
+            with open(path, "w") as f:
+                f.write("plain text log\n")
+
+            with pytest.raises(ValueError):
+                CompressedLogReader(path)
+
+
+class TestLogFollower:
+    """Тесты чтения растущего лога"""
+
+    def test_reads_only_new_complete_lines(self):
+        """Тест что читаются только новые полные строки"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.log")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("INFO old line\n")
+
+            with LogFollower(path) as follower, open(path, "a", encoding="utf-8") as f:
+                assert follower.read_new() == []
+
+                f.write("ERROR new line\nWARNING par")
+                f.flush()
+                assert follower.read_new() == [(LogLevel.ERROR, "ERROR new line")]
+                assert follower.offset == len("INFO old line\nERROR new line\n")
+
+                f.write("tial\nplain text\n")
+                f.flush()
+                assert follower.read_new() == [
+                    (LogLevel.WARNING, "WARNING partial"),
+                    (LogLevel.INFO, "plain text"),
+                ]
+
+    def test_filters_on_logger_output(self):
+        """Тест фильтрации строк, записанных Logger с StandardFormatter"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.log")
+            follower = LogFollower(path, filters=[LevelFilter(LogLevel.WARNING),
+                                                  SimpleLogFilter("disk")])
+
+            with FileHandler(path) as handler:
+                logger = Logger(handlers=[handler], formatters=[StandardFormatter()],
+                                raise_on_reject=False)
+                logger.log_error("disk full")
+                logger.log_info("disk ok")
+                logger.log_error("network down")
+
+            records = list(follower.follow(idle_timeout=0))
+            follower.close()
+
+            assert len(records) == 1
+            assert records[0][0] == LogLevel.ERROR
+            assert records[0][1].endswith("] disk full")
+
+    def test_survives_rotation(self):
+        """Тест перехода на новый файл после ротации без потери строк"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.log")
+            follower = LogFollower(path)
+            seen = []
+
+            with RotatingFileHandler(path, max_bytes=200, compress=False) as handler:
+                for i in range(60):
+                    handler.handle(LogLevel.INFO, f"INFO record {i:02d}")
+
+                    if i % 5 == 4:
+                        seen += [text for _, text in follower.read_new()]
+
+            follower.close()
+            assert len(handler.rotated_segments()) > 3
+            assert seen == [f"INFO record {i:02d}" for i in range(60)]
+
+    def test_truncation_and_resume(self):
+        """Тест чтения после усечения и продолжения с сохраненного смещения"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.log")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("INFO first\nINFO second\n")
+
+            with LogFollower(path, offset=0) as follower:
+                assert len(follower.read_new()) == 2
+                offset = follower.offset
+
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write("INFO again\n")
+
+                assert follower.read_new() == [(LogLevel.INFO, "INFO again")]
+
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("INFO third\n")
+
+            with LogFollower(path, offset=len("INFO again\n")) as follower:
+                assert follower.read_new() == [(LogLevel.INFO, "INFO third")]
+
+            assert offset == len("INFO first\nINFO second\n")
 
 
 class TestStandardFormatter:
@@ -218,6 +1420,42 @@ class TestStandardFormatter:
             assert f"Message for {level.value}" in result
 
 
+class TestTimestampCaching:
+    """Тесты кэширования метки времени в форматтерах"""
+
+    def test_strftime_called_once_per_second(self):
+        """Тест что strftime вызывается только при смене секунды"""
+        formatter = StandardFormatter()
+
+        with patch("labs.Lab3.lab3.time.time", side_effect=[100.1, 100.5, 100.9, 101.2]), \
+                patch("labs.Lab3.lab3.time.strftime", return_value="STAMP") as mock_strftime:
+            results = [formatter.format(LogLevel.INFO, "msg") for _ in range(4)]
+
+        assert mock_strftime.call_count == 2
+        assert results == ["INFO [STAMP] msg"] * 4
+
+    def test_milliseconds_suffix(self):
+        """Тест суффикса миллисекунд"""
+        formatter = StandardFormatter(milliseconds=True)
+
+        with patch("labs.Lab3.lab3.time.time", return_value=100.042):
+            result = formatter.format(LogLevel.ERROR, "msg")
+
+        assert re.fullmatch(r"ERROR \[\d{4}\.\d{2}\.\d{2} \d{2}:\d{2}:\d{2}\.042\] msg", result)
+
+    def test_epoch_formatter(self):
+        """Тест машиночитаемой метки времени"""
+        with patch("labs.Lab3.lab3.time.time_ns", return_value=1_700_000_000_123_456_789):
+            result = EpochFormatter().format(LogLevel.INFO, "msg")
+
+        assert result == "INFO [1700000000123] msg"
+
+        monotonic = EpochFormatter(monotonic=True)
+        first = int(re.search(r"\[(\d+)\]", monotonic.format(LogLevel.INFO, "a")).group(1))
+        second = int(re.search(r"\[(\d+)\]", monotonic.format(LogLevel.INFO, "b")).group(1))
+        assert second >= first
+
+
 class TestIntegration:
     """Интеграционные тесты"""
     
@@ -314,21 +1552,485 @@ class TestErrorScenarios:
         mock_handler.handle.assert_called_once_with(LogLevel.INFO, "")
 
 
+class LocalTcpServer:
+    """Локальный TCP-сервер, собирающий все полученные байты"""
+
+    def __init__(self, port=0):
+        import socket
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", port))
+        self.sock.listen()
+        self.port = self.sock.getsockname()[1]
+        self.connections = 0
+        self.data = b""
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+
+            self.connections += 1
+            threading.Thread(target=self._read, args=(conn,), daemon=True).start()
+
+    def _read(self, conn):
+        with conn:
+            while chunk := conn.recv(65536):
+                with self._lock:
+                    self.data += chunk
+
+    def lines(self):
+        with self._lock:
+            return self.data.decode("utf-8").splitlines()
+
+    def close(self):
+        import socket
+
+        # shutdown будит поток, заблокированный в accept, и снимает прослушивание
+        self.sock.shutdown(socket.SHUT_RDWR)
+        self.sock.close()
+        self._thread.join()
+
+
+def wait_until(predicate, timeout=5.0):
+    import time
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
 class TestSocketHandler:
     """Тесты для SocketHandler"""
-    
-    @patch('socket.socket')
-    def test_socket_handler_success(self, mock_socket):
-        """Тест успешной отправки через сокет"""
-        mock_sock_instance = Mock()
-        mock_socket.return_value.__enter__.return_value = mock_sock_instance
-        
-        handler = SocketHandler("localhost", 8080)
-        handler.handle(LogLevel.INFO, "Test message")
-        
-        mock_socket.assert_called_once()
-        mock_sock_instance.connect.assert_called_once_with(("localhost", 8080))
-        mock_sock_instance.sendall.assert_called_once_with(b"Test message\n")
+
+    def test_socket_handler_success(self):
+        """Тест отправки через одно переиспользуемое соединение"""
+        server = LocalTcpServer()
+        handler = SocketHandler("127.0.0.1", server.port)
+
+        try:
+            for i in range(100):
+                handler.handle(LogLevel.INFO, f"Test message {i}")
+
+            assert handler.flush(timeout=5)
+            assert wait_until(lambda: len(server.lines()) == 100)
+            assert server.lines() == [f"Test message {i}" for i in range(100)]
+            assert server.connections == 1
+        finally:
+            handler.close(timeout=5)
+            server.close()
+
+    def test_socket_handler_reconnects_with_backoff(self):
+        """Тест буферизации при недоступном сервере и переподключения"""
+        probe = LocalTcpServer()
+        port = probe.port
+        probe.close()
+
+        handler = SocketHandler("127.0.0.1", port, backoff_initial=0.01, backoff_max=0.05)
+
+        try:
+            with patch("builtins.print") as mock_print:
+                for i in range(10):
+                    handler.handle(LogLevel.ERROR, f"buffered {i}")
+
+                assert wait_until(lambda: handler.errors >= 2)
+
+            mock_print.assert_called_once()
+            assert "SocketHandler error" in mock_print.call_args[0][0]
+
+            server = LocalTcpServer(port)
+            try:
+                assert handler.flush(timeout=5)
+                assert wait_until(lambda: len(server.lines()) == 10)
+                assert server.lines() == [f"buffered {i}" for i in range(10)]
+            finally:
+                server.close()
+        finally:
+            handler.close(timeout=5)
+
+    def test_socket_handler_bounded_buffer(self):
+        """Тест что при недоступном сервере буфер ограничен"""
+        probe = LocalTcpServer()
+        port = probe.port
+        probe.close()
+
+        handler = SocketHandler("127.0.0.1", port, batch_size=1, capacity=5,
+                                backoff_initial=10)
+
+        with patch("builtins.print"):
+            for i in range(50):
+                handler.handle(LogLevel.ERROR, f"record {i}")
+
+            assert len(handler.queue) <= 5
+            assert handler.dropped >= 44
+
+            handler.close(timeout=5)
+
+        assert handler.flush(timeout=1)
+
+
+class TestAsyncLogger:
+    """Тесты асинхронного логгера и асинхронных обработчиков"""
+
+    def test_alog_with_async_file_handler(self):
+        """Тест общего конвейера фильтров и форматтеров с асинхронной записью в файл"""
+        import asyncio
+
+        async def scenario(path):
+            handler = AsyncFileHandler(path, flush_every=10)
+            formatter = Mock(spec=LogFormatterProtocol)
+            formatter.format.side_effect = lambda level, text: f"{level.value}: {text}"
+
+            async with AsyncLogger(filters=[LevelFilter(LogLevel.INFO)], handlers=[handler],
+                                   formatters=[formatter], raise_on_reject=False) as logger:
+                await logger.alog_debug("hidden")
+                for i in range(25):
+                    await logger.alog(LogLevel.INFO, "record %d", i)
+
+                # 20 записей сброшены пачками, 5 еще в памяти
+                with open(path, encoding="utf-8") as f:
+                    assert len(f.read().splitlines()) == 20
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.log")
+            asyncio.run(scenario(path))
+
+            with open(path, encoding="utf-8") as f:
+                assert f.read().splitlines() == [f"INFO: record {i}" for i in range(25)]
+
+    def test_blocking_handler_runs_in_executor(self):
+        """Тест что блокирующий обработчик не останавливает цикл событий"""
+        import asyncio
+        import time
+
+        calls = []
+
+        class SlowHandler(LogHandlerProtocol):
+            def handle(self, log_level, text):
+                time.sleep(0.05)
+                calls.append((threading.get_ident(), text))
+
+        async def scenario():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.005)
+                    ticks += 1
+
+            task = asyncio.create_task(ticker())
+            async with AsyncLogger(handlers=[SlowHandler()]) as logger:
+                await asyncio.gather(*(logger.alog_info(f"record {i}") for i in range(3)))
+            task.cancel()
+            return ticks
+
+        ticks = asyncio.run(scenario())
+
+        assert ticks >= 5
+        assert [text for _, text in calls] == ["record 0", "record 1", "record 2"]
+        assert threading.get_ident() not in {ident for ident, _ in calls}
+
+    def test_sync_log_inside_coroutine(self):
+        """Тест синхронного log() в корутине: запись доставляется после flush"""
+        import asyncio
+
+        handler = Mock(spec=AsyncLogHandlerProtocol)
+
+        async def scenario():
+            logger = AsyncLogger(handlers=[handler])
+            logger.log_warning("scheduled")
+            handler.handle.assert_not_called()
+            await logger.flush()
+            await logger.aclose()
+
+        asyncio.run(scenario())
+        handler.handle.assert_awaited_once_with(LogLevel.WARNING, "scheduled")
+
+    def test_sync_log_without_loop(self):
+        """Тест синхронного log() вне цикла событий"""
+        logger = AsyncLogger(handlers=[Mock(spec=LogHandlerProtocol)])
+
+        with pytest.raises(RuntimeError):
+            logger.log_info("no loop")
+
+    def test_filter_rejection(self):
+        """Тест отклонения записи фильтром в alog"""
+        import asyncio
+
+        logger = AsyncLogger(filters=[SimpleLogFilter("error")],
+                             handlers=[Mock(spec=LogHandlerProtocol)])
+
+        with pytest.raises(Exception, match="SimpleLogFilter"):
+            asyncio.run(logger.alog_info("all good"))
+
+    def test_async_socket_handler(self):
+        """Тест асинхронной отправки по TCP и отбрасывания записей без сервера"""
+        import asyncio
+
+        server = LocalTcpServer()
+        port = server.port
+
+        async def send(count, prefix):
+            handler = AsyncSocketHandler("127.0.0.1", port, backoff_initial=10)
+            async with AsyncLogger(handlers=[handler]) as logger:
+                for i in range(count):
+                    await logger.alog_info(f"{prefix} {i}")
+            return handler
+
+        try:
+            handler = asyncio.run(send(50, "message"))
+            assert wait_until(lambda: len(server.lines()) == 50)
+            assert server.lines() == [f"message {i}" for i in range(50)]
+            assert handler.reconnects == 1
+        finally:
+            server.close()
+
+        with patch("builtins.print") as mock_print:
+            handler = asyncio.run(send(5, "lost"))
+
+        mock_print.assert_called_once()
+        assert handler.errors == 1
+        assert handler.dropped == 5
+
+
+class TestFanOutLogger:
+    """Тесты параллельной отдачи записей обработчикам"""
+
+    def test_slow_handler_does_not_block_others(self):
+        """Тест что медленный обработчик копит только свою очередь"""
+        release = threading.Event()
+        slow = Mock(spec=LogHandlerProtocol)
+        slow.handle.side_effect = lambda level, text: release.wait(5)
+        fast = Mock(spec=LogHandlerProtocol)
+
+        with FanOutLogger(handlers=[fast, HandlerWorker(slow, capacity=5, batch_size=1)]) as logger:
+            for i in range(20):
+                logger.log_info(f"record {i}")
+
+            fast_worker, slow_worker = logger.handlers
+            assert fast_worker.flush(timeout=5)
+            assert fast.handle.call_count == 20
+            assert slow_worker.health == HandlerHealth.BACKLOGGED
+            assert slow_worker.dropped >= 14
+
+            release.set()
+            assert logger.flush(timeout=5)
+
+        # вытесняются старые записи: последняя запись доставлена
+        assert slow.handle.call_args_list[-1].args == (LogLevel.INFO, "record 19")
+
+    def test_failing_handler_health(self):
+        """Тест что ошибки обработчика видны в его состоянии и не мешают другим"""
+        failing = Mock(spec=LogHandlerProtocol)
+        failing.handle.side_effect = OSError("disk full")
+        healthy = Mock(spec=LogHandlerProtocol)
+
+        with patch("builtins.print") as mock_print:
+            with FanOutLogger(handlers=[failing, healthy]) as logger:
+                for i in range(5):
+                    logger.log_error(f"record {i}")
+
+                assert logger.flush(timeout=5)
+                health = logger.health()
+
+        mock_print.assert_called_once()
+        failing_status, healthy_status = health.values()
+        assert failing_status["health"] == "failing"
+        assert failing_status["errors"] == 5
+        assert "disk full" in failing_status["last_error"]
+        assert healthy_status == {
+            "health": "healthy", "queued": 0, "capacity": 10_000, "handled": 5,
+            "errors": 0, "dropped": 0, "last_error": None,
+        }
+
+    def test_handlers_added_in_place_are_wrapped(self):
+        """Тест что обработчики, добавленные после создания, тоже в своем потоке"""
+        first = Mock(spec=LogHandlerProtocol)
+        added = Mock(spec=LogHandlerProtocol)
+        routed = Mock(spec=LogHandlerProtocol)
+
+        with FanOutLogger(handlers=[first], capacity=50) as logger:
+            logger.handlers.append(added)
+            logger.handlers.append(HandlerRoute(routed, level=LogLevel.ERROR))
+
+            assert all(isinstance(worker, HandlerWorker) for worker in logger._targets)
+            assert logger.handlers[1].queue.capacity == 50
+            assert logger.handlers[2].handler.handler is routed
+
+            logger.log_info("info")
+            logger.log_error("error")
+
+            assert logger.flush(timeout=5)
+            assert len(logger.health()) == 3
+
+        assert added.handle.call_count == 2
+        assert routed.handle.call_args_list[0].args == (LogLevel.ERROR, "error")
+
+    def test_block_policy_with_timeout(self):
+        """Тест политики BLOCK: вызывающий ждет не дольше put_timeout"""
+        release = threading.Event()
+        handler = Mock(spec=LogHandlerProtocol)
+        handler.handle.side_effect = lambda level, text: release.wait(5)
+
+        with HandlerWorker(handler, capacity=1, policy=OverflowPolicy.BLOCK,
+                           batch_size=1, put_timeout=0.01) as worker:
+            for i in range(4):
+                worker.handle(LogLevel.INFO, f"record {i}")
+
+            assert worker.dropped >= 1
+            release.set()
+
+        assert worker.health == HandlerHealth.STOPPED
+
+    def test_shutdown_closes_handlers(self):
+        """Тест что остановка дописывает очереди и закрывает обработчики"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.log")
+            handler = FileHandler(path, flush_every=None)
+
+            with FanOutLogger(handlers=[handler]) as logger:
+                for i in range(100):
+                    logger.log_info(f"record {i}")
+
+            assert handler._file is None
+            with open(path, encoding="utf-8") as f:
+                assert len(f.read().splitlines()) == 100
+
+
+class TestBytesPipeline:
+    """Тесты передачи записи байтовым обработчикам без повторного кодирования"""
+
+    def test_encoded_once_and_shared(self):
+        """Тест что все байтовые обработчики получают один и тот же объект bytes"""
+        first = Mock(spec=LogBytesHandlerProtocol)
+        second = Mock(spec=LogBytesHandlerProtocol)
+        text_handler = Mock(spec=LogHandlerProtocol)
+
+        logger = Logger(handlers=[first, text_handler, second])
+        logger.log_info("запись")
+
+        data = first.handle_bytes.call_args.args[1]
+        assert data == "запись\n".encode("utf-8")
+        assert second.handle_bytes.call_args.args[1] is data
+        text_handler.handle.assert_called_once_with(LogLevel.INFO, "запись")
+
+    def test_file_handler_batch_keeps_order(self):
+        """Тест пачечной записи после буферизованных записей"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.log")
+
+            with FileHandler(path, flush_every=None) as handler:
+                handler.handle(LogLevel.INFO, "buffered")
+                handler.handle_batch([(LogLevel.INFO, f"batch {i}\n".encode()) for i in range(3)])
+
+                with open(path, encoding="utf-8") as f:
+                    assert f.read().splitlines() == ["buffered", "batch 0", "batch 1", "batch 2"]
+
+    def test_scatter_write_partial(self):
+        """Тест продолжения после частичной записи"""
+        written = bytearray()
+
+        def write(views):
+            chunk = b"".join(bytes(v) for v in views)[:3]
+            written.extend(chunk)
+            return len(chunk)
+
+        _scatter_write(write, [b"abcd", b"", b"ef", b"ghijk"])
+        assert bytes(written) == b"abcdefghijk"
+
+    def test_fan_out_uses_batches(self):
+        """Тест что рабочий поток байтового обработчика пишет пачками"""
+        handler = Mock(spec=LogBytesHandlerProtocol)
+
+        with FanOutLogger(handlers=[handler]) as logger:
+            assert isinstance(logger.handlers[0], BytesHandlerWorker)
+            for i in range(10):
+                logger.log_info(f"record {i}")
+
+        records = [record for call in handler.handle_batch.call_args_list for record in call.args[0]]
+        assert records == [(LogLevel.INFO, f"record {i}\n".encode()) for i in range(10)]
+
+
+class TestBoundLogger:
+    """Тесты структурированных записей с привязанными полями"""
+
+    def test_bind_appends_logfmt_fields(self):
+        """Тест что поля дописываются к тексту и видны фильтрам"""
+        handler = Mock(spec=LogHandlerProtocol)
+        logger = Logger(filters=[SimpleLogFilter("request_id=r-1")], handlers=[handler])
+
+        bound = logger.bind(request_id="r-1", host="web 1")
+        bound.log_info("user %s logged in", "bob", latency_ms=12)
+
+        assert isinstance(bound, BoundLogger)
+        handler.handle.assert_called_once_with(
+            LogLevel.INFO, 'user bob logged in request_id=r-1 host="web 1" latency_ms=12'
+        )
+
+    def test_json_lines(self):
+        """Тест вывода JSON Lines с полями привязки и вызова"""
+        import json
+
+        handler = Mock(spec=LogHandlerProtocol)
+        logger = Logger(handlers=[handler], formatters=[JsonFormatter()])
+
+        logger.bind(service="api").bind(request_id="r-1").log_error("сбой", code=500)
+        logger.log_info("без полей")
+
+        first, second = (json.loads(c.args[1]) for c in handler.handle.call_args_list)
+        assert first["level"] == "ERROR"
+        assert first["message"] == "сбой"
+        assert {k: first[k] for k in ("service", "request_id", "code")} == {
+            "service": "api", "request_id": "r-1", "code": 500,
+        }
+        assert set(second) == {"time", "level", "message"}
+
+    def test_static_fields_serialized_once(self):
+        """Тест что постоянные поля не сериализуются на каждой записи"""
+        handler = Mock(spec=LogHandlerProtocol)
+        bound = Logger(handlers=[handler]).bind(host="web1")
+
+        with patch("labs.Lab3.lab3.serialize_fields", wraps=lambda fields: ("", "")) as mock_serialize:
+            for i in range(10):
+                bound.log_info(f"record {i}")
+
+        mock_serialize.assert_not_called()
+        assert all(isinstance(c.args[1], StructuredMessage) for c in handler.handle.call_args_list)
+
+    def test_rebind_overrides_field(self):
+        """Тест переопределения поля при повторной привязке"""
+        import json
+
+        handler = Mock(spec=LogHandlerProtocol)
+        logger = Logger(handlers=[handler], formatters=[JsonFormatter()])
+
+        logger.bind(host="a", zone="z").bind(host="b").log_info("moved")
+
+        line = handler.handle.call_args.args[1]
+        assert line.count('"host"') == 1
+        assert json.loads(line)["host"] == "b"
+
+    def test_level_gate(self):
+        """Тест что отсеянные по уровню записи не сериализуют поля вызова"""
+        handler = Mock(spec=LogHandlerProtocol)
+        bound = Logger(filters=[LevelFilter(LogLevel.WARNING)], handlers=[handler],
+                       raise_on_reject=False).bind(a=1)
+
+        with patch("labs.Lab3.lab3.serialize_fields") as mock_serialize:
+            bound.log_debug("hidden", payload=object())
+
+        mock_serialize.assert_not_called()
+        handler.handle.assert_not_called()
 
 
 class TestSysLogHandler:
@@ -343,24 +2045,132 @@ class TestSysLogHandler:
         mock_write.assert_called_once_with("SYSLOG: Error message\n")
 
 
+class FakeFtp:
+    """Локальная замена FTP: хранит выгруженные файлы в памяти"""
+
+    instances = []
+    fail_next_store = 0
+    refuse_connect = False
+
+    def __init__(self):
+        self.files = {}
+        self.logins = []
+        FakeFtp.instances.append(self)
+
+    def connect(self, host, port, timeout=None):
+        if FakeFtp.refuse_connect:
+            raise ConnectionRefusedError("connection refused")
+        self.address = (host, port)
+
+    def login(self, user, passwd):
+        self.logins.append((user, passwd))
+
+    def storbinary(self, cmd, fp):
+        if FakeFtp.fail_next_store:
+            FakeFtp.fail_next_store -= 1
+            raise OSError("connection lost")
+        self.files[cmd.removeprefix("STOR ")] = fp.read()
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_ftp():
+    FakeFtp.instances = []
+    FakeFtp.fail_next_store = 0
+    FakeFtp.refuse_connect = False
+    return FakeFtp
+
+
 class TestFtpHandler:
     """Тесты для FtpHandler"""
-    
-    @patch('ftplib.FTP')
-    @patch('builtins.open')
-    def test_ftp_handler_success(self, mock_open, mock_ftp):
-        """Тест успешной загрузки на FTP"""
-        mock_ftp_instance = Mock()
-        mock_ftp.return_value.__enter__.return_value = mock_ftp_instance
-        
-        mock_file = Mock()
-        mock_open.return_value.__enter__.return_value = mock_file
-        
-        handler = FtpHandler("ftp.example.com", 21, "user", "pass")
-        handler.handle(LogLevel.INFO, "Test log message")
-        
-        mock_ftp.assert_called_once_with("ftp.example.com")
-        mock_ftp_instance.login.assert_called_once_with("user", "pass")
+
+    def test_ftp_handler_success(self, fake_ftp):
+        """Тест выгрузки пачкой через одну сессию без временных файлов"""
+        handler = FtpHandler("ftp.example.com", 2121, "user", "pass",
+                             batch_size=10, flush_interval=None, ftp_factory=fake_ftp)
+
+        with patch("builtins.open") as mock_open:
+            for i in range(25):
+                handler.handle(LogLevel.INFO, f"Test log message {i}")
+            handler.close()
+
+        mock_open.assert_not_called()
+        assert len(fake_ftp.instances) == 1
+
+        ftp = fake_ftp.instances[0]
+        assert ftp.address == ("ftp.example.com", 2121)
+        assert ftp.logins == [("user", "pass")]
+        assert len(ftp.files) == 3 and handler.uploads == 3
+
+        uploaded = b"".join(ftp.files[name] for name in sorted(ftp.files))
+        assert uploaded.decode("utf-8").splitlines() == [
+            f"Test log message {i}" for i in range(25)
+        ]
+
+    def test_ftp_handler_flush_by_interval(self, fake_ftp):
+        """Тест выгрузки по времени"""
+        handler = FtpHandler("ftp.example.com", 21, "user", "pass",
+                             batch_size=100, flush_interval=0.01, ftp_factory=fake_ftp)
+
+        handler.handle(LogLevel.INFO, "lonely record")
+        assert wait_until(lambda: handler.uploads == 1)
+        handler.close()
+
+        assert list(fake_ftp.instances[0].files.values()) == [b"lonely record\n"]
+
+    def test_ftp_handler_reconnects_and_keeps_records(self, fake_ftp):
+        """Тест сохранения записей при ошибке выгрузки"""
+        handler = FtpHandler("ftp.example.com", 21, "user", "pass",
+                             batch_size=100, flush_interval=None, ftp_factory=fake_ftp)
+        handler.handle(LogLevel.INFO, "first")
+        handler.flush()
+
+        fake_ftp.fail_next_store = 2
+        handler.handle(LogLevel.INFO, "second")
+
+        with patch("builtins.print") as mock_print:
+            assert handler.flush() is False
+
+        assert handler.errors == 1
+        assert "FTPHandler error" in mock_print.call_args[0][0]
+
+        handler.close()
+
+        files = {}
+        for ftp in fake_ftp.instances:
+            files.update(ftp.files)
+        assert sorted(files.values()) == [b"first\n", b"second\n"]
+
+    def test_ftp_handler_backoff_while_server_down(self, fake_ftp):
+        """Тест паузы между попытками и ограничения буфера при недоступном сервере"""
+        fake_ftp.refuse_connect = True
+        handler = FtpHandler("ftp.example.com", 21, "user", "pass",
+                             batch_size=1, flush_interval=None, max_buffered=50,
+                             backoff_initial=0.05, backoff_max=1.0, ftp_factory=fake_ftp)
+
+        with patch("builtins.print") as mock_print:
+            for i in range(200):
+                handler.handle(LogLevel.INFO, f"record {i}")
+                time.sleep(0.001)
+
+            # 1 + 2 + 4 ... паузы по 0.05 с: за время записи не больше нескольких попыток
+            assert len(fake_ftp.instances) <= 5
+            assert len(handler._buffer) <= 50
+            assert handler.dropped >= 150
+
+            fake_ftp.refuse_connect = False
+            handler.close()
+
+        mock_print.assert_called_once()
+        uploaded = b"".join(
+            data for ftp in fake_ftp.instances for _, data in sorted(ftp.files.items())
+        )
+        assert uploaded.decode("utf-8").splitlines()[-1] == "record 199"
 
 
 class TestFilterCombinations:
@@ -426,3 +2236,164 @@ class TestMultipleFormatters:
         assert call_args[0] == LogLevel.INFO
         assert "INFO [" in call_args[1]
         assert "Test message" in call_args[1]
+
+
+class TestRecordQueue:
+    """Тесты ограниченной очереди записей"""
+
+    def test_drop_newest(self):
+        """Тест отбрасывания новых записей при переполнении"""
+        queue = RecordQueue(2, OverflowPolicy.DROP_NEWEST)
+
+        assert queue.put(1) and queue.put(2)
+        assert queue.put(3) is False
+        assert queue.get_batch(10) == [1, 2]
+        assert queue.dropped == 1
+
+    def test_drop_oldest(self):
+        """Тест вытеснения старых записей при переполнении"""
+        queue = RecordQueue(2, OverflowPolicy.DROP_OLDEST)
+
+        for item in range(5):
+            assert queue.put(item)
+
+        assert queue.get_batch(10) == [3, 4]
+        assert queue.dropped == 3
+
+    def test_block_timeout(self):
+        """Тест блокировки с таймаутом"""
+        queue = RecordQueue(1, OverflowPolicy.BLOCK)
+        queue.put(1)
+
+        assert queue.put(2, timeout=0.01) is False
+        assert queue.dropped == 1
+
+    def test_closed_queue(self):
+        """Тест записи в закрытую очередь"""
+        queue = RecordQueue(1)
+        queue.close()
+
+        with pytest.raises(RuntimeError):
+            queue.put(1)
+        assert queue.get_batch(10) == []
+
+
+class TestQueueLogger:
+    """Тесты логгера с фоновой очередью"""
+
+    def test_records_delivered_in_order(self):
+        """Тест доставки записей рабочим потоком"""
+        handler = Mock()
+
+        with QueueLogger(handlers=[handler], batch_size=8) as logger:
+            for i in range(100):
+                logger.log_info(f"message {i}")
+
+            assert logger.flush(timeout=5)
+
+        messages = [call.args[1] for call in handler.handle.call_args_list]
+        assert messages == [f"message {i}" for i in range(100)]
+
+    def test_filters_run_on_caller(self):
+        """Тест что фильтры по-прежнему проверяются в вызывающем потоке"""
+        with QueueLogger(filters=[LevelFilter(LogLevel.ERROR)]) as logger:
+            with pytest.raises(Exception, match="Filter LevelFilter failed"):
+                logger.log_info("info")
+
+    def test_drop_newest_does_not_block_caller(self):
+        """Тест что медленный обработчик не блокирует вызывающий поток"""
+        release = threading.Event()
+        handler = Mock()
+        handler.handle.side_effect = lambda *args: release.wait(5)
+
+        logger = QueueLogger(handlers=[handler], capacity=2,
+                             policy=OverflowPolicy.DROP_NEWEST, batch_size=1)
+
+        for i in range(20):
+            logger.log_error(f"message {i}")
+
+        assert logger.dropped > 0
+
+        release.set()
+        logger.shutdown(timeout=5)
+
+        assert handler.handle.call_count + logger.dropped == 20
+
+    def test_shutdown_drains_queue(self):
+        """Тест что при остановке очередь вычитывается до конца"""
+        handler = Mock()
+        logger = QueueLogger(handlers=[handler])
+
+        for i in range(50):
+            logger.log_warning(f"message {i}")
+
+        logger.shutdown(timeout=5)
+
+        assert handler.handle.call_count == 50
+        with pytest.raises(RuntimeError, match="shut down"):
+            logger.log_info("late message")
+
+    def test_handler_errors_are_counted(self):
+        """Тест подсчета ошибок обработчиков"""
+        handler = Mock()
+        handler.handle.side_effect = Exception("Handler failed")
+
+        with QueueLogger(handlers=[handler]) as logger:
+            logger.log_info("message")
+            logger.flush(timeout=5)
+
+            assert logger.errors == 1
+
+
+def _collector_file_handlers(path):
+    return [FileHandler(path, flush_every=None)]
+
+
+def _collector_worker(handler, worker_id, count):
+    logger = Logger(handlers=[handler])
+
+    for i in range(count):
+        logger.log_info(f"worker {worker_id} record {i}")
+
+
+class TestLogCollector:
+    """Тесты сбора логов нескольких процессов"""
+
+    def test_workers_write_through_collector(self):
+        """Тест записи из нескольких процессов через один процесс-сборщик"""
+        import functools
+        import multiprocessing
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "app.log")
+            collector = LogCollector(functools.partial(_collector_file_handlers, path),
+                                     batch_size=64)
+
+            with collector:
+                workers = [
+                    multiprocessing.Process(target=_collector_worker,
+                                            args=(collector.handler(), worker_id, 200))
+                    for worker_id in range(4)
+                ]
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join()
+
+            with open(path, encoding="utf-8") as f:
+                lines = f.read().splitlines()
+
+            assert len(lines) == 800
+            for worker_id in range(4):
+                own = [line for line in lines if line.startswith(f"worker {worker_id} ")]
+                assert own == [f"worker {worker_id} record {i}" for i in range(200)]
+
+    def test_handler_drops_when_full(self):
+        """Тест ограниченного буфера: при переполнении записи отбрасываются"""
+        collector = LogCollector(list, capacity=1)
+        handler = collector.handler(timeout=0.01)
+
+        for i in range(3):
+            handler.handle(LogLevel.INFO, f"record {i}")
+
+        assert handler.dropped >= 1
@@ -0,0 +1,169 @@
+import io
+import json
+import os
+import tempfile
+
+import pytest
+from labs.Lab2.lab2 import ANSI, BannerExporter, Color, GlyphAtlas, Printer
+
+
+FONT = {
+    "A": [" # ", "# #", "###", "# #", "# #"],
+    "B": ["## ", "# #", "## ", "# #", "## "],
+    " ": ["   ", "   ", "   ", "   ", "   "],
+}
+
+
+@pytest.fixture
+def font_file():
+    with tempfile.NamedTemporaryFile(
+        mode="w", suffix=".json", delete=False, encoding="utf-8"
+    ) as temp_file:
+        json.dump(FONT, temp_file)
+
+    yield temp_file.name
+    os.unlink(temp_file.name)
+
+
+class TestPrinterRender:
+    """Тесты рендера Printer без терминала"""
+
+    def test_render_has_no_ansi(self, font_file):
+        """Тест что рендер не содержит escape-последовательностей"""
+        printer = Printer(Color.RED, (1, 1), "*", font_file)
+        result = printer.render("ab")
+
+        assert "\033" not in result
+        assert result.splitlines() == [
+            " *   **",
+            "* *  * *",
+            "***  **",
+            "* *  * *",
+            "* *  **",
+        ]
+
+    def test_render_colored(self, font_file):
+        """Тест цветного рендера"""
+        printer = Printer(Color.GREEN, (1, 1), "#", font_file)
+        lines = printer.render("A", colored=True).splitlines()
+
+        assert all(line.startswith(Color.GREEN.value) for line in lines)
+        assert all(line.endswith(ANSI.RESET.value) for line in lines)
+        assert ANSI.CLEAR.value not in "".join(lines)
+
+    def test_render_bytes(self, font_file):
+        """Тест рендера в байты"""
+        printer = Printer(Color.GREEN, (1, 1), "♥", font_file)
+        assert printer.render_bytes("A") == printer.render("A").encode("utf-8")
+
+    def test_render_static(self, font_file):
+        """Тест статического рендера"""
+        printer = Printer(Color.GREEN, (1, 1), "#", font_file)
+        assert Printer.render_static("BA", "#", font_file) == printer.render("BA")
+
+
+class TestGlyphAtlas:
+    """Тесты атласа глифов на numpy"""
+
+    @pytest.fixture(autouse=True)
+    def _numpy(self):
+        pytest.importorskip("numpy")
+
+    def test_atlas_matches_printer(self, font_file):
+        """Тест что атлас без масштаба совпадает с обычным рендером"""
+        printer = Printer(Color.RED, (1, 1), "♥", font_file)
+        atlas = GlyphAtlas.from_file(font_file)
+
+        assert atlas.render("ab ba", "♥") == printer.render("ab ba")
+
+    def test_atlas_scaling(self, font_file):
+        """Тест целочисленного масштабирования"""
+        atlas = GlyphAtlas.from_file(font_file)
+        matrix = atlas.matrix("A", scale=3)
+
+        assert matrix.shape == (15, 15)
+        assert matrix[:3, 3:6].all()
+        assert not matrix[:3, :3].any()
+
+    def test_atlas_multichar_symbol(self, font_file):
+        """Тест символа из нескольких знаков"""
+        atlas = GlyphAtlas.from_file(font_file)
+        assert atlas.render_lines("A", "[]")[0] == " [] " + "  "
+
+    def test_atlas_empty_text(self, font_file):
+        """Тест пустой строки"""
+        atlas = GlyphAtlas.from_file(font_file)
+        assert atlas.render_lines("", "#", 2) == [""] * 10
+
+    def test_printer_scale(self, font_file):
+        """Тест масштаба в Printer и в пакетном экспорте"""
+        printer = Printer(Color.RED, (1, 1), "#", font_file, scale=2)
+        lines = printer.render("B").splitlines()
+
+        assert len(lines) == 10
+        assert lines[0] == "####"
+        assert printer.render("B") == GlyphAtlas.from_file(font_file).render("B", "#", 2)
+
+        output = io.BytesIO()
+        BannerExporter(workers=1).export([("B", font_file, {"scale": 2})], output)
+        assert output.getvalue() == printer.render_bytes("B") + b"\n"
+
+
+class TestBannerExporter:
+    """Тесты пакетного экспорта баннеров"""
+
+    def test_export_to_stream(self, font_file):
+        """Тест экспорта в поток с сохранением порядка заданий"""
+        jobs = [
+            (text, font_file, {"symbol": symbol})
+            for text, symbol in [("A", "*"), ("B", "+"), ("AB", "@")] * 10
+        ]
+        output = io.BytesIO()
+
+        stats = BannerExporter(workers=2, chunksize=4).export(jobs, output)
+
+        expected = b"".join(
+            Printer.render_static(text, options["symbol"], font).encode() + b"\n"
+            for text, font, options in jobs
+        )
+        assert output.getvalue() == expected
+        assert stats.banners == len(jobs)
+        assert stats.bytes_written == len(expected)
+        assert stats.banners_per_sec > 0
+
+    def test_export_to_file_with_color(self, font_file):
+        """Тест экспорта в файл с цветом, заданным по имени"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "banners.txt")
+            BannerExporter(workers=1).export([("A", font_file, {"color": "red"})], path)
+
+            with open(path, "rb") as f:
+                content = f.read()
+
+        assert content.startswith(Color.RED.value.encode())
+
+    def test_jobs_consumed_in_bounded_windows(self, font_file):
+        """Тест что задания читаются пачками, а не все сразу"""
+        consumed = []
+
+        def jobs():
+            for i in range(1000):
+                consumed.append(i)
+                yield ("AB"[i % 2], font_file, {})
+
+        exporter = BannerExporter(workers=1, chunksize=4, max_pending=2)
+        banners = exporter.iter_render(jobs())
+
+        first = next(banners)
+        assert len(consumed) <= 4 * 2
+        banners.close()
+
+        assert first == Printer.render_static("A", "#", font_file).encode()
+
+    def test_invalid_chunksize(self):
+        """Тест некорректного размера пачки"""
+        with pytest.raises(ValueError):
+            BannerExporter(chunksize=0)
+
+        with pytest.raises(ValueError):
+            BannerExporter(max_pending=0)